@@ -0,0 +1,67 @@
+#! /usr/bin/python3
+"""Archive of finished games, one `HeadlessGame.to_record` JSON per line.
+
+    python3 archive.py games.jsonl --games 1000
+
+plays AI games and appends them to the archive; `export.py` turns archived
+games into images.
+"""
+
+import argparse
+import json
+import random
+
+import pygame as pg
+
+from engine import HeadlessGame, HEADLESS_HAND
+from player import NeuralNetwork
+from utils import init_headless_display, DOUBLE_SIX, TILE_SETS
+
+
+def write_games(path, records):
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def read_games(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def play_games(games, max_pips=DOUBLE_SIX, policy=None, seed=None):
+    rng = random.Random(seed)
+    for _ in range(games):
+        game = HeadlessGame([NeuralNetwork(policy, **HEADLESS_HAND),
+                             NeuralNetwork(policy, **HEADLESS_HAND)],
+                            max_pips, rng=rng)
+        game.play()
+        yield game.to_record()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--max-pips', type=int, default=DOUBLE_SIX,
+                        choices=TILE_SETS)
+    parser.add_argument('--policy', help='weights of a trained policy')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    init_headless_display()
+
+    policy = None
+    if args.policy:
+        from policy import Policy
+        policy = Policy.load(args.policy)
+
+    write_games(args.path,
+                play_games(args.games, args.max_pips, policy, args.seed))
+    pg.quit()
+
+
+if __name__ == '__main__':
+    main()
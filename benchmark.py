@@ -0,0 +1,97 @@
+#! /usr/bin/python3
+"""Measure how the engine scales with the size of the domino set.
+
+Plays AI against AI games headless for double-6, double-9 and double-12 sets
+and reports the time spent in move generation, collision checks and
+rendering of the board.
+
+    python3 benchmark.py --games 20
+"""
+
+import argparse
+import random
+import time
+
+import pygame as pg
+
+from player import NeuralNetwork
+from engine import HeadlessGame, HEADLESS_HAND
+from printables import Board
+from utils import (
+    init_headless_display, make_tile_set, TILE_SETS,
+)
+
+
+class Timer:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.calls += 1
+        return timed
+
+    def per_call_us(self):
+        return self.seconds / self.calls * 1e6 if self.calls else 0.0
+
+
+def play_game(max_pips, move_timer, collision_timer, render_timer):
+    board = Board()
+    board.intersects_anything = collision_timer.wrap(board.intersects_anything)
+    render = render_timer.wrap(board.rec_blit)
+
+    # Players have no instance dict, the timed turn is a method of a subclass
+    class TimedNetwork(NeuralNetwork):
+        __slots__ = ()
+        turn = move_timer.wrap(NeuralNetwork.turn)
+
+    players = [TimedNetwork(**HEADLESS_HAND), TimedNetwork(**HEADLESS_HAND)]
+    game = HeadlessGame(players, max_pips, rng=random, board=board)
+    while not game.finished():
+        moves = game.moves
+        game.step()
+        if game.moves != moves:
+            render()
+
+    return len(board.tiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    init_headless_display()
+
+    print(f'{"set":>10} {"tiles":>6} {"placed":>7} {"move us":>9} '
+          f'{"collide us":>11} {"render ms":>10} {"game s":>8}')
+    for max_pips in TILE_SETS:
+        random.seed(args.seed)
+        move_timer, collision_timer, render_timer = Timer(), Timer(), Timer()
+        placed = 0
+        start = time.perf_counter()
+        for _ in range(args.games):
+            placed += play_game(max_pips, move_timer, collision_timer,
+                                render_timer)
+        elapsed = time.perf_counter() - start
+
+        print(f'{"double-" + str(max_pips):>10} '
+              f'{len(make_tile_set(max_pips)):>6} '
+              f'{placed / args.games:>7.1f} '
+              f'{move_timer.per_call_us():>9.1f} '
+              f'{collision_timer.per_call_us():>11.2f} '
+              f'{render_timer.per_call_us() / 1e3:>10.2f} '
+              f'{elapsed / args.games:>8.3f}')
+
+    pg.quit()
+
+
+if __name__ == '__main__':
+    main()
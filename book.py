@@ -0,0 +1,94 @@
+"""Opening book of the best first moves, built offline by build_book.py.
+
+The book is a file of fixed-size records sorted by the key of the position,
+read through `mmap`: opening it parses nothing but the header, a lookup is a
+binary search over the mapped pages and processes reading the same book share
+them.
+
+A position is what the player to move knows: its hand, the tiles on the board
+and the pips of the open ends. Where the tiles lie on the board does not
+matter this early in the game.
+"""
+
+import hashlib
+import mmap
+import struct
+
+from printables import placement_pip
+
+MAGIC = b'DOMBOOK1'
+# magic, max pips, depth (most tiles on the board), number of records
+HEADER = struct.Struct('<8sHHI')
+# key, the tile to play, the pip it is placed on, win rate in percent
+RECORD = struct.Struct('<QBBBB')
+_SEPARATOR = 255
+
+
+def _normalized(tiles):
+    return sorted((min(tile.first, tile.second), max(tile.first, tile.second))
+                  for tile in tiles)
+
+
+def position_key(hand, board, max_pips):
+    """64 bit hash of a position, the same for any order of the tiles."""
+    pips = sorted(placement_pip(tile, possible_rect.dir)
+                  for tile in board.tiles
+                  for possible_rect in tile.possible_placements)
+    data = bytearray([max_pips])
+    for tiles in (hand.tiles, board.tiles):
+        for first, second in _normalized(tiles):
+            data += bytes((first, second))
+        data.append(_SEPARATOR)
+    data += bytes(pips)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(),
+                          'little')
+
+
+def write_book(path, entries, max_pips, depth):
+    """Write `entries`, (key, first, second, pip, win_rate) tuples, as a book.
+    """
+    entries = sorted(entries)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, max_pips, depth, len(entries)))
+        for key, first, second, pip, win_rate in entries:
+            f.write(RECORD.pack(key, first, second, pip,
+                                round(win_rate * 100)))
+
+
+class OpeningBook:
+    __slots__ = ('_mmap', 'max_pips', 'depth', 'size')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.max_pips, self.depth, self.size = HEADER.unpack_from(
+            self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an opening book')
+
+    def __len__(self):
+        return self.size
+
+    def find(self, key):
+        """Return (first, second, pip, win_rate) for `key` or None."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            found, first, second, pip, win_rate = RECORD.unpack_from(
+                self._mmap, offset)
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return first, second, pip, win_rate / 100
+        return None
+
+    def lookup(self, hand, board):
+        if len(board.tiles) > self.depth:
+            return None
+        return self.find(position_key(hand, board, self.max_pips))
+
+    def close(self):
+        self._mmap.close()
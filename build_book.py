@@ -0,0 +1,198 @@
+#! /usr/bin/python3
+"""Build an opening book (see book.py) by simulating opening positions.
+
+Opening positions are collected from seeded games between heuristic players:
+every position with at most --depth tiles on the board where the player to
+move has a choice. Every possible move of a position is played out
+--simulations times against deals of the tiles the player has not seen, the
+same deals for every move, and the move which wins most goes in the book.
+Positions are simulated in parallel by a process pool.
+
+    python3 build_book.py book.bin --games 2000 --simulations 200
+
+The AI uses the book with python3 main.py --book book.bin.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import random
+import time
+
+from book import position_key, write_book
+from engine import (
+    HeadlessGame, HEADLESS_HAND, NUMBER_OF_TILES_IN_HAND, PLAY,
+)
+from heuristic import Heuristic
+from player import HeuristicPlayer
+from printables import (
+    find_all_placements, make_turn, placement_pip,
+)
+from utils import (
+    init_headless_display, make_tile_set, DOUBLE_SIX, TILE_SETS,
+)
+
+DEPTH = 3
+SIMULATIONS = 100
+# Deals of the unseen tiles which change who starts are dealt again
+DEAL_ATTEMPTS = 20
+
+
+def _players(max_pips):
+    heuristic = Heuristic(max_pips=max_pips)
+    return [HeuristicPlayer(heuristic, **HEADLESS_HAND),
+            HeuristicPlayer(heuristic, **HEADLESS_HAND)]
+
+
+def _sorted_pips(tile):
+    return min(tile.first, tile.second), max(tile.first, tile.second)
+
+
+def _moves(game):
+    """The distinct moves of the player to move: (first, second, pip)."""
+    moves = []
+    for tile, _, area, _ in find_all_placements(game.current_player.hand,
+                                                game.board):
+        move = _sorted_pips(tile) + (placement_pip(area.tile, area.rect.dir),)
+        if move not in moves:
+            moves.append(move)
+    return moves
+
+
+def _make_move(game, move):
+    first, second, pip = move
+    for tile, rotations, area, normalized_rect in find_all_placements(
+            game.current_player.hand, game.board):
+        if (_sorted_pips(tile) + (placement_pip(area.tile, area.rect.dir),)
+                == move):
+            game.play_turn(make_turn(tile, rotations, area, normalized_rect))
+            return
+    raise ValueError(f'{first}:{second} can not be placed on {pip}')
+
+
+def opening_positions(games, depth=DEPTH, max_pips=DOUBLE_SIX, seed=0):
+    """Yield (key, deal, actions) for the opening positions of `games` seeded
+    games, every position once."""
+    rng = random.Random(seed)
+    seen = set()
+    for _ in range(games):
+        game = HeadlessGame(_players(max_pips), max_pips, rng)
+        # Positions after a bazar draw are not in the book, the deals of
+        # the unseen tiles would have to draw the same tiles
+        while (not game.finished() and len(game.board.tiles) <= depth
+               and all(action[0] == PLAY for action in game.actions)):
+            key = position_key(game.current_player.hand, game.board,
+                               max_pips)
+            if key not in seen and len(_moves(game)) > 1:
+                seen.add(key)
+                yield key, game.deal, list(game.actions)
+            game.step()
+
+
+def _replay(deal, actions, max_pips):
+    game = HeadlessGame(_players(max_pips), max_pips, bazar=deal)
+    for action in actions:
+        game.play_turn(game.turn_from_action(action))
+    return game
+
+
+def _deal_unseen(game, max_pips, rng):
+    """Deal the tiles the player to move has not seen again, so that the
+    game up to now can be replayed: return the new deal or None."""
+    seat = game.turn_number
+    # HeadlessGame pops the hands from the end of the deal, seat 0 first
+    own_hand = game.deal[-NUMBER_OF_TILES_IN_HAND * (seat + 1):
+                         len(game.deal) - NUMBER_OF_TILES_IN_HAND * seat]
+    # Rotated tiles may have their pips swapped, the deal has them sorted
+    board = [_sorted_pips(tile) for tile in game.board.tiles]
+    opponent_played = [tile for tile in board if tile not in own_hand]
+    unseen = [tile for tile in make_tile_set(max_pips)
+              if tile not in own_hand and tile not in board]
+    opponent_size = len(game.players[1 - seat].hand.tiles)
+
+    for _ in range(DEAL_ATTEMPTS):
+        rng.shuffle(unseen)
+        hands = [None, None]
+        hands[seat] = own_hand[::-1]
+        hands[1 - seat] = opponent_played + unseen[:opponent_size]
+        deal = unseen[opponent_size:] + hands[1][::-1] + hands[0][::-1]
+        # The lowest tile starts, a deal which changes it is another game
+        start = HeadlessGame(_players(max_pips), max_pips, bazar=deal)
+        if _sorted_pips(next(iter(start.board.tiles))) == board[0]:
+            return deal
+    return None
+
+
+def simulate(task):
+    """Play out every move of a position, return (key, first, second, pip,
+    win_rate) for the best one."""
+    key, deal, actions, max_pips, simulations, seed = task
+    game = _replay(deal, actions, max_pips)
+    seat = game.turn_number
+    moves = _moves(game)
+    wins = [0.0] * len(moves)
+    rng = random.Random(seed)
+    played = 0
+    for _ in range(simulations):
+        sampled = _deal_unseen(game, max_pips, rng)
+        if sampled is None:
+            continue
+        played += 1
+        for i, move in enumerate(moves):
+            playout = _replay(sampled, actions, max_pips)
+            _make_move(playout, move)
+            winner = playout.play()
+            if winner is None:
+                wins[i] += 0.5
+            elif winner == seat:
+                wins[i] += 1
+
+    best = max(range(len(moves)), key=wins.__getitem__)
+    return (key, *moves[best], wins[best] / max(played, 1))
+
+
+def build(path, games, depth=DEPTH, simulations=SIMULATIONS,
+          max_pips=DOUBLE_SIX, seed=0, workers=None):
+    """Build a book from the opening positions of `games` games, return the
+    number of positions."""
+    tasks = ((key, deal, actions, max_pips, simulations, seed + i)
+             for i, (key, deal, actions) in enumerate(
+                 opening_positions(games, depth, max_pips, seed)))
+    with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=init_headless_display) as pool:
+        entries = list(pool.map(simulate, tasks, chunksize=4))
+
+    temporary = path + '.tmp'
+    write_book(temporary, entries, max_pips, depth)
+    os.replace(temporary, path)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('book')
+    parser.add_argument('--games', type=int, default=1000,
+                        help='seeded games the opening positions come from')
+    parser.add_argument('--depth', type=int, default=DEPTH,
+                        help='most tiles on the board of a position')
+    parser.add_argument('--simulations', type=int, default=SIMULATIONS,
+                        help='deals every move of a position is played with')
+    parser.add_argument('--max-pips', type=int, default=DOUBLE_SIX,
+                        choices=TILE_SETS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    # The parent process plays the games the positions come from
+    init_headless_display()
+    start = time.perf_counter()
+    positions = build(args.book, args.games, args.depth, args.simulations,
+                      args.max_pips, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f'{positions} positions in {elapsed:.1f}s '
+          f'({positions / elapsed:.1f} positions/s), '
+          f'{os.path.getsize(args.book)} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import random
+
+import tracing
+from player import NeuralNetwork
+from printables import Board, Tile, find_possible_turns
+from utils import make_tile_set, Placement, Turn, DOUBLE_SIX
+
+NUMBER_OF_TILES_IN_HAND = 7
+# Keyword arguments of a player whose hand is never drawn, which like the
+# board of a headless game then does not need a full size surface
+HEADLESS_HAND = {'width': 1, 'height': 1}
+
+PLAY = 'play'
+DRAW = 'draw'
+PASS = 'pass'
+
+
+class HeadlessGame:
+    """A game between AI players which is never shown on a screen.
+
+    Follows the rules of `main.Game`: the lowest tile starts, a player who
+    can not move takes a tile from the bazar and the game ends when a hand
+    is empty or nobody can move (fish).
+
+    `actions` records the game, so it can be played again with `replay`.
+    """
+    __slots__ = ('players', 'max_pips', 'rng', 'board', 'bazar', 'deal',
+                 'actions', 'turn_number', 'moves', '_passes', '_finished')
+
+    def __init__(self, players, max_pips=DOUBLE_SIX, rng=None, board=None,
+                 bazar=None):
+        self.players = players
+        self.max_pips = max_pips
+        self.rng = rng or random.Random()
+        # Nothing is drawn, so a board does not need a 4000x4000 surface
+        self.board = board or Board(width=1, height=1)
+        if bazar is None:
+            bazar = make_tile_set(max_pips)
+            self.rng.shuffle(bazar)
+        self.bazar = list(bazar)
+        self.deal = list(bazar)
+        self.actions = []
+        self.turn_number = 0
+        self.moves = 0
+        self._passes = 0
+        self._finished = False
+
+        for player in self.players:
+            for _ in range(NUMBER_OF_TILES_IN_HAND):
+                player.hand.add_tile(Tile(*self.bazar.pop()))
+        self._place_first_tile()
+
+    @property
+    def current_player(self):
+        return self.players[self.turn_number]
+
+    def _place_first_tile(self):
+        player_idx = 0
+        first_tile = Tile(0, 0)
+        for i, player in enumerate(self.players):
+            player_best_tile = min(player.hand.tiles)
+            if player_best_tile < first_tile:
+                first_tile = player_best_tile
+                player_idx = i
+
+        self.players[player_idx].hand.remove_tile(first_tile)
+        self.board.place_tile(first_tile, None, None,
+                              self.board.WIDTH / 2, self.board.HEIGHT / 2)
+        self._next_turn(player_idx)
+
+    def _next_turn(self, player_idx=None):
+        if player_idx is None:
+            player_idx = self.turn_number
+        self.turn_number = (player_idx + 1) % len(self.players)
+
+    def legal_turns(self):
+        return list(find_possible_turns(self.current_player.hand, self.board))
+
+    def step(self):
+        """Let the current player make a turn, take a tile or pass."""
+        turn = self.current_player.turn(self.board)
+        if turn:
+            self.play_turn(turn)
+        else:
+            self.draw_or_pass()
+
+    def play_turn(self, turn):
+        player = self.current_player
+        self.actions.append([
+            PLAY, list(self.board.tiles).index(turn.old_tile),
+            turn.possible_rect.dir.name, turn.tile._angle // 90,
+            turn.tile_from_hand.first, turn.tile_from_hand.second,
+        ])
+        player.hand.remove_tile(turn.tile_from_hand)
+        self.board.place_tile(turn.tile, turn.old_tile, turn.possible_rect,
+                              turn.rect.x, turn.rect.y)
+        if tracing.enabled:
+            tracing.record(tracing.TURN, self.turn_number, turn.tile.first,
+                           turn.tile.second, turn.rect.x, turn.rect.y)
+        self.moves += 1
+        self._passes = 0
+        if not player.hand.tiles:
+            self._finished = True
+        else:
+            self._next_turn()
+
+    def draw_or_pass(self):
+        if self.bazar:
+            self.actions.append([DRAW])
+            value = self.bazar.pop()
+            self.current_player.hand.add_tile(Tile(*value))
+            if tracing.enabled:
+                tracing.record(tracing.BAZAR_DRAW, self.turn_number, *value,
+                               len(self.bazar))
+            return
+
+        self.actions.append([PASS])
+        self._passes += 1
+        if self._passes >= len(self.players):
+            # FISH
+            self._finished = True
+        else:
+            self._next_turn()
+
+    def finished(self):
+        return self._finished
+
+    def play(self):
+        while not self._finished:
+            self.step()
+        return self.winner()
+
+    def pips(self):
+        return [sum(player.hand.tiles) for player in self.players]
+
+    def winner(self):
+        """Index of the winner, None for a draw or a game still running."""
+        if not self._finished:
+            return None
+
+        for i, player in enumerate(self.players):
+            if not player.hand.tiles:
+                return i
+
+        pips = self.pips()
+        minimum_points = min(pips)
+        if pips.count(minimum_points) > 1:
+            return None
+        return pips.index(minimum_points)
+
+    def turn_from_action(self, action):
+        """Make the turn a `PLAY` action of `actions` describes."""
+        _, tile_index, direction, rotations, first, second = action
+        tile_from_hand = next(
+            tile for tile in self.current_player.hand.tiles
+            if (tile.first, tile.second) == (first, second))
+        old_tile = list(self.board.tiles)[tile_index]
+        possible_rect = next(rect for rect in old_tile.possible_placements
+                             if rect.dir.name == direction)
+
+        tile = Tile(first, second)
+        for _ in range(rotations):
+            tile.rotate()
+        rect = self.board.is_valid_turn(tile, Placement(old_tile,
+                                                        possible_rect))
+        return Turn(tile, old_tile, rect, possible_rect, tile_from_hand)
+
+    def to_record(self):
+        return {
+            'max_pips': self.max_pips,
+            'bazar': self.deal,
+            'actions': self.actions,
+            'winner': self.winner(),
+            'pips': self.pips(),
+        }
+
+
+def replay(record, board=None, players=None):
+    """Play a game of `HeadlessGame.to_record` again.
+
+    Yields the game before the first action and after every action with the
+    action made. Pass `players` to draw their hands.
+    """
+    players = players or [NeuralNetwork(**HEADLESS_HAND),
+                          NeuralNetwork(**HEADLESS_HAND)]
+    game = HeadlessGame(players, record['max_pips'], board=board,
+                        bazar=[tuple(tile) for tile in record['bazar']])
+    yield game, None
+    for action in record['actions']:
+        if action[0] == PLAY:
+            game.play_turn(game.turn_from_action(action))
+        else:
+            game.draw_or_pass()
+        yield game, action
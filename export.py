@@ -0,0 +1,165 @@
+#! /usr/bin/python3
+"""Export archived games (see archive.py) to PNG images without a screen.
+
+Every game is replayed with the usual `Board`, `Hand` and `Tile` sprites and
+written either as a frame per action or, with --summary, as one image with a
+thumbnail of the board after every move. Games are exported in parallel by a
+process pool.
+
+    python3 export.py games.jsonl out/ --summary --workers 8
+"""
+
+import argparse
+import concurrent.futures
+import os
+import time
+
+import pygame as pg
+
+from archive import read_games
+from engine import replay, PLAY
+from player import NeuralNetwork
+from printables import Board, Hand, draw_board_thumbnail
+from utils import init_headless_display
+
+MARGIN = 50
+SUMMARY_CELL = 200
+SUMMARY_COLUMNS = 6
+GAME_DIRECTORY_PATTERN = 'game_{:05d}'
+FRAME_PATTERN = '{:04d}.png'
+SUMMARY_PATTERN = 'game_{:05d}.png'
+
+
+def _init_worker():
+    init_headless_display()
+    # For the move numbers of summaries
+    pg.font.init()
+
+
+def _board_bounds(record):
+    *_, (game, _) = replay(record)
+    rects = [tile.rect for tile in game.board.tiles]
+    return rects[0].unionall(rects).inflate(MARGIN * 2, MARGIN * 2)
+
+
+def export_frames(record, directory):
+    """Write a frame per action, return the number of frames."""
+    os.makedirs(directory, exist_ok=True)
+    bounds = _board_bounds(record)
+
+    # Placed tiles never move, so only new ones are drawn on the canvas
+    canvas = pg.Surface(bounds.size)
+    canvas.fill(pg.Color(Board.default_color))
+    # Grown when a hand needs more rows than a hand surface has
+    frame = pg.Surface((max(bounds.width, (Hand.WIDTH + MARGIN) * 2),
+                        bounds.height + Hand.HEIGHT))
+    drawn = 0
+
+    frames = 0
+    for game, _ in replay(record,
+                          players=[NeuralNetwork(), NeuralNetwork()]):
+        tiles = list(game.board.tiles)
+        for tile in tiles[drawn:]:
+            canvas.blit(tile.surf, (tile.rect.x - bounds.x,
+                                    tile.rect.y - bounds.y))
+        drawn = len(tiles)
+
+        # Saving is most of the export time, so only the part of the hands
+        # with tiles goes into a frame
+        hands = []
+        for player in game.players:
+            rects = [tile.rect for tile in player.hand.tiles]
+            if rects:
+                hands.append((player.hand, pg.Rect(
+                    0, 0, *rects[0].unionall(rects).bottomright)))
+        width = max([bounds.width] + [sum(used.width + MARGIN
+                                          for _, used in hands)])
+        height = bounds.height + max([0] + [used.height for _, used in hands])
+        if width > frame.get_width() or height > frame.get_height():
+            frame = pg.Surface((max(width, frame.get_width()),
+                                max(height, frame.get_height())))
+
+        frame.fill(pg.Color('black'))
+        frame.blit(canvas, (0, 0))
+        x = 0
+        for hand, used in hands:
+            hand.rec_blit()
+            frame.blit(hand.surf, (x, bounds.height), used)
+            # Rows below the hand surface are only seen by scrolling it
+            inside = hand.surf.get_rect()
+            for tile in hand.tiles:
+                if not inside.contains(tile.rect):
+                    frame.blit(tile.surf, (x + tile.rect.x,
+                                           bounds.height + tile.rect.y))
+            x += used.width + MARGIN
+
+        pg.image.save(
+            frame.subsurface((0, 0, width, height)),
+            os.path.join(directory, FRAME_PATTERN.format(frames)))
+        frames += 1
+    return frames
+
+
+def export_summary(record, path):
+    """Write one image with the board after every move, return the number of
+    thumbnails."""
+    moves = sum(1 for action in record['actions'] if action[0] == PLAY) + 1
+    rows = (moves + SUMMARY_COLUMNS - 1) // SUMMARY_COLUMNS
+    summary = pg.Surface((SUMMARY_COLUMNS * SUMMARY_CELL, rows * SUMMARY_CELL))
+    summary.fill(pg.Color('black'))
+    cell = pg.Surface((SUMMARY_CELL - 2, SUMMARY_CELL - 2))
+    font = pg.font.Font(None, 20)
+
+    move = 0
+    for game, action in replay(record):
+        if action is not None and action[0] != PLAY:
+            continue
+        draw_board_thumbnail(game.board, cell)
+        cell.blit(font.render(f'#{move}', False, (0, 0, 128)), (4, 4))
+        summary.blit(cell, ((move % SUMMARY_COLUMNS) * SUMMARY_CELL + 1,
+                            (move // SUMMARY_COLUMNS) * SUMMARY_CELL + 1))
+        move += 1
+
+    pg.image.save(summary, path)
+    return move
+
+
+def export_game(task):
+    index, record, out_directory, summary = task
+    if summary:
+        return export_summary(
+            record, os.path.join(out_directory, SUMMARY_PATTERN.format(index)))
+    return export_frames(
+        record, os.path.join(out_directory,
+                             GAME_DIRECTORY_PATTERN.format(index)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archive')
+    parser.add_argument('out_directory')
+    parser.add_argument('--summary', action='store_true',
+                        help='one image per game instead of a frame per '
+                             'action')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    os.makedirs(args.out_directory, exist_ok=True)
+    tasks = ((i, record, args.out_directory, args.summary)
+             for i, record in enumerate(read_games(args.archive)))
+
+    start = time.perf_counter()
+    games = images = 0
+    with concurrent.futures.ProcessPoolExecutor(
+            args.workers, initializer=_init_worker) as pool:
+        for count in pool.map(export_game, tasks, chunksize=8):
+            games += 1
+            images += count
+
+    elapsed = time.perf_counter() - start
+    print(f'{games} games exported in {elapsed:.1f}s '
+          f'({games / elapsed:.1f} games/s, {images} images)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Hand-written move evaluation for the `HeuristicPlayer`, tuned by tune.py.
+
+Every placement of a tile from the hand is scored with a weighted sum of
+features:
+
+- pips shed: the pips of the placed tile, which no longer count against
+  the player when the game is blocked,
+- double dumped: whether the tile is a double, doubles fit fewer ends,
+- suit control: the tiles left in the hand which follow the pip the tile
+  leaves open,
+- opponent suit: the tiles with that pip the player has not seen, the
+  opponent (or the bazar) is likely to hold them.
+
+Everything about a tile comes from lookup tables built once per tile set.
+With an opening book (see book.py) the first moves are read from the book.
+"""
+
+import functools
+import json
+
+from printables import find_all_placements, make_turn, placement_pip
+from utils import make_tile_set, DOUBLE_SIX
+
+FEATURES = ('pips_shed', 'double_dumped', 'suit_control', 'opponent_suit')
+DEFAULT_WEIGHTS = (1.0, 4.0, 2.0, -1.0)
+
+
+@functools.lru_cache(maxsize=None)
+def tile_features(max_pips=DOUBLE_SIX):
+    """Map (first, second), in both orders, to (pips, is_double, suits)."""
+    table = {}
+    for first, second in make_tile_set(max_pips):
+        suits = (first,) if first == second else (first, second)
+        features = (first + second, int(first == second), suits)
+        table[(first, second)] = table[(second, first)] = features
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def open_pips(max_pips=DOUBLE_SIX):
+    """Map (first, second, matched pip) to the pip the tile leaves open."""
+    return {(first, second, pip): second if pip == first else first
+            for first, second in tile_features(max_pips)
+            for pip in (first, second)}
+
+
+class Heuristic:
+    __slots__ = ('weights', 'max_pips', 'book')
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, max_pips=DOUBLE_SIX,
+                 book=None):
+        if len(weights) != len(FEATURES):
+            raise ValueError(f'{len(FEATURES)} weights expected, '
+                             f'got {len(weights)}')
+        self.weights = tuple(float(weight) for weight in weights)
+        self.max_pips = max_pips
+        if book and book.max_pips != max_pips:
+            raise ValueError(f'the book is for a double-{book.max_pips} set')
+        self.book = book
+
+    @classmethod
+    def load(cls, path, book=None):
+        with open(path) as f:
+            saved = json.load(f)
+        return cls(saved['weights'], saved['max_pips'], book)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'weights': self.weights, 'max_pips': self.max_pips}, f)
+
+    def suit_counts(self, hand, board):
+        """Count the tiles of every suit in `hand` and the ones not seen."""
+        table = tile_features(self.max_pips)
+        # Every suit has a tile with each pip, its double included once
+        unseen = [self.max_pips + 1] * (self.max_pips + 1)
+        held = [0] * (self.max_pips + 1)
+        for tile in hand.tiles:
+            for suit in table[(tile.first, tile.second)][2]:
+                held[suit] += 1
+                unseen[suit] -= 1
+        for tile in board.tiles:
+            for suit in table[(tile.first, tile.second)][2]:
+                unseen[suit] -= 1
+        return held, unseen
+
+    def score(self, tile, open_pip, held, unseen):
+        pips, double, suits = tile_features(self.max_pips)[
+            (tile.first, tile.second)]
+        control = held[open_pip] - (open_pip in suits)
+        w_pips, w_double, w_control, w_opponent = self.weights
+        return (w_pips * pips + w_double * double + w_control * control
+                + w_opponent * unseen[open_pip])
+
+    def choose_turn(self, hand, board):
+        if self.book:
+            turn = self.book_turn(hand, board)
+            if turn:
+                return turn
+
+        held, unseen = self.suit_counts(hand, board)
+        pips = open_pips(self.max_pips)
+        best = best_score = None
+        for tile, rotations, area, normalized_rect in find_all_placements(
+                hand, board):
+            open_pip = pips[(tile.first, tile.second,
+                             placement_pip(area.tile, area.rect.dir))]
+            score = self.score(tile, open_pip, held, unseen)
+            if best is None or score > best_score:
+                best = tile, rotations, area, normalized_rect
+                best_score = score
+        return make_turn(*best) if best else None
+
+    def book_turn(self, hand, board):
+        move = self.book.lookup(hand, board)
+        if not move:
+            return None
+        first, second, pip, _ = move
+        for tile, rotations, area, normalized_rect in find_all_placements(
+                hand, board):
+            if ((min(tile.first, tile.second), max(tile.first, tile.second))
+                    == (first, second)
+                    and placement_pip(area.tile, area.rect.dir) == pip):
+                return make_turn(tile, rotations, area, normalized_rect)
+        return None
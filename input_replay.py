@@ -0,0 +1,370 @@
+#! /usr/bin/python3
+"""Play whole games through the interactive loop with scripted input.
+
+Events are posted with `pg.event.post` before every frame of `main.Game`, so
+they go through the same handlers as a player's clicks. They come either from
+a bot, which clicks the first possible turn together (choosing the tile,
+rotating it, dragging the board to the open end, choosing it and submitting)
+and now and then zooms or drags the board, or from a script recorded with
+--record. Games run under the dummy video driver as fast as they can; the
+frames per second and percentiles of the time spent handling every type of
+event are printed at the end.
+
+    python3 input_replay.py --games 20 --record input.jsonl
+    python3 input_replay.py --script input.jsonl
+
+Hands of the double-twelve set grow long enough to reach the buttons, these
+games check nothing the bot clicks is covered:
+
+    python3 input_replay.py --games 5 --seed 2 --max-pips 12
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame as pg  # noqa: E402
+
+from main import Game, REAL_PLAYER_NUMBER  # noqa: E402
+from printables import find_possible_turns  # noqa: E402
+from utils import (  # noqa: E402
+    Point, DOUBLE_SIX, MB_LEFT, MB_RIGHT, SCREEN_WIDTH, SCREEN_HEIGHT,
+    TILE_SETS,
+)
+
+PERCENTILES = (50, 90, 99)
+# A game which takes longer is stuck
+MAX_FRAMES_PER_GAME = 5000
+# Chance the bot zooms or drags the board in a frame it has nothing to do
+FIDGET_CHANCE = 0.05
+DRAG_STEPS = 4
+# Tries of other points of an open end when a click chose another one
+CLICK_ATTEMPTS = 5
+# Fractions of a tile or button, points tried when its center is covered
+CLICK_FRACTIONS = (1 / 2, 1 / 4, 3 / 4)
+# Attributes of the events the game handles, kept in scripts
+EVENT_ATTRIBUTES = {
+    pg.MOUSEBUTTONDOWN: ('button', 'pos'),
+    pg.MOUSEBUTTONUP: ('button', 'pos'),
+    pg.MOUSEMOTION: ('pos', 'rel', 'buttons'),
+    pg.MOUSEWHEEL: ('x', 'y'),
+    pg.KEYDOWN: ('key',),
+}
+_NO_BUTTONS = (0, 0, 0)
+_RIGHT_BUTTON = (0, 0, 1)
+
+
+def _center(sprite):
+    shift = sprite.get_shift()
+    return (shift.x + sprite.rect.width // 2,
+            shift.y + sprite.rect.height // 2)
+
+
+def _move(pos, buttons=_NO_BUTTONS, rel=(0, 0)):
+    return pg.event.Event(pg.MOUSEMOTION, pos=pos, rel=rel, buttons=buttons)
+
+
+def _click(pos, button=MB_LEFT):
+    return [_move(pos),
+            pg.event.Event(pg.MOUSEBUTTONDOWN, button=button, pos=pos),
+            pg.event.Event(pg.MOUSEBUTTONUP, button=button, pos=pos)]
+
+
+def _drag(start, rel):
+    events = [_move(start),
+              pg.event.Event(pg.MOUSEBUTTONDOWN, button=MB_RIGHT, pos=start)]
+    x, y = start
+    for step in range(DRAG_STEPS):
+        # The last step takes what is left after rounding
+        dx = round(rel[0] * (step + 1) / DRAG_STEPS) - (x - start[0])
+        dy = round(rel[1] * (step + 1) / DRAG_STEPS) - (y - start[1])
+        x, y = x + dx, y + dy
+        events.append(_move((x, y), _RIGHT_BUTTON, (dx, dy)))
+    events.append(pg.event.Event(pg.MOUSEBUTTONUP, button=MB_RIGHT,
+                                 pos=(x, y)))
+    return events
+
+
+def _wheel(pos, y):
+    return [_move(pos), pg.event.Event(pg.MOUSEWHEEL, x=0, y=y)]
+
+
+def _key(key):
+    return [pg.event.Event(pg.KEYDOWN, key=key)]
+
+
+class InputBot:
+    """Posts the events of a player who makes the first possible turn."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self._target = None
+        self._clicks = collections.Counter()
+        # Kept until it is made, turns found for a rotated hand tile are
+        # relative to its rotation
+        self._turn = None
+        self._board_size = 0
+
+    def events(self, game):
+        if game.finished():
+            # Restarting ends the game loop
+            return _key(pg.K_r)
+        if game.turn_number != REAL_PLAYER_NUMBER:
+            return self._fidget(game)
+        if game._user_needs_tile:
+            return self._press(game, game.buttons[2])
+
+        hand = game.players[REAL_PLAYER_NUMBER].hand
+        if (self._turn is None or self._board_size != len(game.board.tiles)
+                or self._clicks[id(self._turn.possible_rect)]
+                >= CLICK_ATTEMPTS):
+            self._turn = self._plan_turn(game, hand)
+            self._board_size = len(game.board.tiles)
+        if self._turn is None:
+            # The game takes a tile or skips the turn by itself
+            return []
+        return self._make_turn(game, hand, self._turn)
+
+    def _plan_turn(self, game, hand):
+        # Open ends another one covers can not be chosen by a click
+        turns = [turn for turn in find_possible_turns(hand, game.board)
+                 if self._clicks[id(turn.possible_rect)] < CLICK_ATTEMPTS]
+        if not turns:
+            self._clicks.clear()
+            return None
+        return turns[0]
+
+    def _make_turn(self, game, hand, turn):
+        tile = turn.tile_from_hand
+        if hand.chosen_tile is not tile:
+            pos = self._click_point(game, tile)
+            if pos is None:
+                # Scrolled out of the hand or covered, the wheel scrolls it
+                return _wheel(_center(hand), -1 if tile.rect.y > 0 else 1)
+            return _click(pos)
+
+        # What the board checks, the angle of a rotated hand tile differs
+        if ((tile.first, tile.second, tile.orientation)
+                != (turn.tile.first, turn.tile.second, turn.tile.orientation)):
+            return self._press(game, game.buttons[0])
+
+        area = game.board.chosen_area
+        if (area is None or area.tile is not turn.old_tile
+                or area.rect is not turn.possible_rect):
+            return self._choose_area(game, turn.possible_rect)
+
+        self._clicks.clear()
+        self._turn = None
+        return self._press(game, game.buttons[1])
+
+    def _choose_area(self, game, rect):
+        tries = self._clicks[id(rect)]
+        self._clicks[id(rect)] += 1
+        # The center first, then points closer to the corners
+        if tries % CLICK_ATTEMPTS:
+            angle = math.pi / 2 * (tries % CLICK_ATTEMPTS) + math.pi / 4
+            local = (rect.centerx + math.cos(angle) * rect.width / 3,
+                     rect.centery + math.sin(angle) * rect.height / 3)
+        else:
+            local = rect.center
+
+        board = game.board
+        pos = (round(board.rect.x + local[0] * board.zoom),
+               round(board.rect.y + local[1] * board.zoom))
+        if not self._is_free(game, pos):
+            target = self._free_target(game)
+            return _drag(target, (target[0] - pos[0], target[1] - pos[1]))
+        return _click(pos)
+
+    def _fidget(self, game):
+        if self.rng.random() >= FIDGET_CHANCE:
+            return []
+        target = self._free_target(game)
+        if self.rng.random() < 0.5:
+            return _wheel(target, self.rng.choice((-1, 1)))
+        return _drag(target, (self.rng.randint(-50, 50),
+                              self.rng.randint(-50, 50)))
+
+    def _press(self, game, button):
+        pos = self._click_point(game, button)
+        if pos is None:
+            # Buttons do not move, clicking again would never end the game
+            raise RuntimeError(f'button {game.buttons.index(button)} '
+                               'can not be clicked')
+        return _click(pos)
+
+    @staticmethod
+    def _reaches(game, pos, sprite):
+        """Whether a click at `pos` reaches `sprite`, a hand tile or a
+        button: the hand may have scrolled it out, and buttons, drawn over
+        everything else, take the click first."""
+        if not (0 <= pos[0] < SCREEN_WIDTH and 0 <= pos[1] < SCREEN_HEIGHT):
+            return False
+        node = sprite
+        while node is not None:
+            if not node.in_it(pos):
+                return False
+            node = node.parent
+        for button in game.buttons:
+            if button.in_it(pos):
+                return button is sprite
+        return True
+
+    def _click_point(self, game, sprite):
+        """The center of `sprite` or, when it is covered, another point of
+        it a click reaches, None if there is none."""
+        shift = sprite.get_shift()
+        for fx in CLICK_FRACTIONS:
+            for fy in CLICK_FRACTIONS:
+                pos = (shift.x + int(sprite.rect.width * fx),
+                       shift.y + int(sprite.rect.height * fy))
+                if self._reaches(game, pos, sprite):
+                    return pos
+        return None
+
+    @staticmethod
+    def _is_free(game, pos):
+        """Whether a click at `pos` reaches the board and nothing else."""
+        if not (0 <= pos[0] < SCREEN_WIDTH and 0 <= pos[1] < SCREEN_HEIGHT):
+            return False
+        return not any(sprite.rect.collidepoint(pos)
+                       for sprite in game.sprites if sprite is not game.board)
+
+    def _free_target(self, game):
+        """The free point nearest to the center of the screen."""
+        if self._target is None or not self._is_free(game, self._target):
+            center = Point(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+            points = sorted(
+                ((x, y) for x in range(0, SCREEN_WIDTH, 50)
+                 for y in range(0, SCREEN_HEIGHT, 50)),
+                key=lambda p: abs(p[0] - center.x) + abs(p[1] - center.y))
+            self._target = next(p for p in points if self._is_free(game, p))
+        return self._target
+
+
+class InputScript:
+    """Events recorded by --record, posted at the frames they were."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            self.header = json.loads(next(f))
+            self._frames = collections.defaultdict(list)
+            for line in f:
+                frame, kind, attributes = json.loads(line)
+                for name, value in attributes.items():
+                    if isinstance(value, list):
+                        attributes[name] = tuple(value)
+                self._frames[frame].append(pg.event.Event(kind, attributes))
+        self.frame = 0
+
+    def events(self, game):
+        events = self._frames.pop(self.frame, [])
+        self.frame += 1
+        return events
+
+
+def percentile(values, percent):
+    """Nearest rank percentile of sorted `values`."""
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def play(source, games, max_pips=DOUBLE_SIX, recorded=None):
+    """Play `games` games with the events of `source`, return the number of
+    frames, the seconds they took and the handling times per event type.
+
+    Posted events are appended to `recorded` as (frame, type, attributes).
+    """
+    timings = collections.defaultdict(list)
+    frames = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        game = Game(max_pips=max_pips)
+        handle_event = game._handle_event
+        handle_frame = game._handle_frame
+        game_frames = 0
+
+        def timed_event(event):
+            event_start = time.perf_counter()
+            handle_event(event)
+            timings[pg.event.event_name(event.type)].append(
+                time.perf_counter() - event_start)
+
+        def frame():
+            nonlocal frames, game_frames
+            for event in source.events(game):
+                if recorded is not None:
+                    recorded.append((frames, event.type, {
+                        name: getattr(event, name)
+                        for name in EVENT_ATTRIBUTES[event.type]}))
+                pg.event.post(event)
+            frame_start = time.perf_counter()
+            handle_frame()
+            timings['frame'].append(time.perf_counter() - frame_start)
+            frames += 1
+            game_frames += 1
+            if game_frames > MAX_FRAMES_PER_GAME:
+                raise RuntimeError(f'no end after {game_frames} frames')
+
+        # Instance attributes, so Game.run() calls the timed versions
+        game._handle_event = timed_event
+        game._handle_frame = frame
+        game.run()
+    return frames, time.perf_counter() - start, timings
+
+
+def print_report(games, frames, elapsed, timings):
+    print(f'{games} games, {frames} frames in {elapsed:.1f}s '
+          f'({frames / elapsed:.0f} FPS)')
+    print(f'{"event":<18}{"count":>7}' + ''.join(
+        f'{f"p{p} ms":>10}' for p in PERCENTILES) + f'{"max ms":>10}')
+    for name, values in sorted(timings.items()):
+        values.sort()
+        print(f'{name:<18}{len(values):>7}' + ''.join(
+            f'{percentile(values, p) * 1000:>10.3f}' for p in PERCENTILES)
+            + f'{values[-1] * 1000:>10.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--max-pips', type=int, choices=TILE_SETS,
+                        default=DOUBLE_SIX)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--script',
+                        help='replay the events recorded in this file')
+    parser.add_argument('--record',
+                        help='write the events the bot made to this file')
+    args = parser.parse_args()
+
+    if args.script:
+        source = InputScript(args.script)
+        args.games = source.header['games']
+        args.max_pips = source.header['max_pips']
+        args.seed = source.header['seed']
+    else:
+        source = InputBot(random.Random(args.seed))
+    # The game takes tiles from the bazar with the global random
+    random.seed(args.seed)
+
+    recorded = [] if args.record else None
+    frames, elapsed, timings = play(source, args.games, args.max_pips,
+                                    recorded)
+    print_report(args.games, frames, elapsed, timings)
+
+    if args.record:
+        with open(args.record, 'w') as f:
+            f.write(json.dumps({'games': args.games, 'max_pips': args.max_pips,
+                                'seed': args.seed}) + '\n')
+            for event in recorded:
+                f.write(json.dumps(event) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,27 @@
 #! /usr/bin/python3
 
+import argparse
 import logging
 import random
+import time
 
-import pygame as pg
+# Taken before pygame is imported, so --profile-startup includes the imports
+STARTED_AT = time.perf_counter()
 
-from player import NeuralNetwork, RealPlayer
-from printables import (
+import pygame as pg  # noqa: E402
+
+import tracing  # noqa: E402
+from heuristic import Heuristic  # noqa: E402
+from match import Match, record_hand, TARGET_SCORE  # noqa: E402
+from player import HeuristicPlayer, NeuralNetwork, RealPlayer  # noqa: E402
+from printables import (  # noqa: E402
     Tile, Board, ButtonHolder, Button, Printable, find_possible_turn,
 )
-from utils import in_it, get_sprite_path, Point
+from stats import StatsStore, STATS_FILE  # noqa: E402
+from utils import (  # noqa: E402
+    in_it, get_sprite_path, get_ticks, Point, make_tile_set,
+    DOUBLE_SIX, MB_LEFT, MB_RIGHT, SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SETS,
+)
 
 
 LOG = logging.getLogger(__name__)
@@ -23,36 +35,68 @@ def init_logging():
     LOG.addHandler(ch)
 
 
-SCREEN_WIDTH = 1000
-SCREEN_HEIGHT = 1000
-
 INF = 1e4
 
-MB_LEFT = 1
-MB_RIGHT = 3
 REAL_PLAYER_NUMBER = 0
 II_NUMBER = 1
 
 PLAYER_POSITIONS = [(0, SCREEN_HEIGHT - Tile.HEIGHT * 6),
                     (SCREEN_WIDTH - Tile.WIDTH, 0)]
-POSSIBLE_TILES = [
-    (first, second)
-    for first in range(0, 7)
-    for second in range(first, 7)
-]
+BUTTON_HOLDER_POSITION = Point(SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100)
 NUMBER_OF_TILES_IN_HAND = 7
 
+# Spectator mode: moves made per frame, None means as many as fit in a frame
+SPEED_LEVELS = {pg.K_1: 1, pg.K_2: 10, pg.K_3: None}
+SPEED_NAMES = {'1': 1, '10': 10, 'max': None}
+# Frame rate of spectator mode, at the max speed the game takes all the time
+# between two frames
+SPECTATOR_FPS = 10
+# How long the result of a game stays on screen before the next one starts
+SPECTATOR_PAUSE_MS = 1000
+
 ROTATE_BUTTON_FILEPATH = get_sprite_path('rotate_button')
 SUBMIT_BUTTON_FILEPATH = get_sprite_path('submit_button')
 BAZAR_FILEPATH = get_sprite_path('bazar')
 
+TRACE_FILE = 'trace.jsonl'
+TEXT_LINE_HEIGHT = 40
+FONT_SIZE = 32
+
+
+class StartupProfile:
+    """Time spent in every phase from the start of the program to the first
+    frame."""
+
+    def __init__(self, started_at=STARTED_AT):
+        self.phases = []
+        self._last = self.started_at = started_at
+
+    def mark(self, phase):
+        """End `phase` now, it started where the previous one ended."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        lines = [f'{phase:<14}{seconds * 1000:>8.1f} ms'
+                 for phase, seconds in self.phases]
+        lines.append(f'{"first frame":<14}'
+                     f'{(self._last - self.started_at) * 1000:>8.1f} ms')
+        return lines
+
 
 class Game:
-    def __init__(self):
+    def __init__(self, max_pips=DOUBLE_SIX, spectator=False, speed=1,
+                 policy=None, trace_file=TRACE_FILE, match=None, stats=None,
+                 profile=None, heuristic=None):
+        self.profile = profile
         pg.font.init()
-        self.font = pg.font.SysFont('freesansbold.ttf', 32)
+        # The font bundled with pygame, a system font would need a font scan
+        self.font = pg.font.Font(None, FONT_SIZE)
+        self._profile('font')
 
         self.screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self._profile('display')
         self._running = True
         self.sprites = pg.sprite.Group()
         self.texts = []
@@ -60,27 +104,60 @@ class Game:
         self.board = None
         self.players = None
         self.turn_number = 0
-        self.possible_tiles = POSSIBLE_TILES.copy()
+        self.max_pips = max_pips
+        self.possible_tiles = make_tile_set(max_pips)
         self._right_mouse_pressed = False
         self._mouse_position = (0, 0)
         self.restart = False
         self._user_needs_tile = False
         self._finished = False
+        self.spectator = spectator
+        self.policy = policy
+        self.heuristic = heuristic
+        self.trace_file = trace_file
+        self.match = match or Match()
+        self.stats = stats
+        self.speed = speed
+        self._speed_text = None
+        self._finished_at = None
+        self._clock = pg.time.Clock()
+        # Screen rects of what the last frame drew, to find what to redraw
+        self._drawn = {}
 
     def run(self):
         self._init_sprites()
         self._init_game_start()
+        self._profile('deal')
         while self._running:
             self._handle_frame()
+            if self.profile:
+                self._profile('render')
+                self._log_profile()
         pg.quit()
         return self.restart
 
+    def _profile(self, phase):
+        if self.profile:
+            self.profile.mark(phase)
+
+    def _log_profile(self):
+        for line in self.profile.report():
+            LOG.info(line)
+        # Only the start of the program is profiled
+        self.profile = None
+
     def _init_sprites(self):
         self._init_board()
         self.sprites.add(self.board)
+        self._profile('board')
 
         self._init_players()
-        self._init_buttons()
+        self._profile('players')
+        if self.spectator:
+            self._set_speed(self.speed)
+        else:
+            self._init_buttons()
+        self._profile('buttons')
 
     def _init_board(self):
         x_shift = -(Board.WIDTH - SCREEN_WIDTH) / 2
@@ -88,46 +165,57 @@ class Game:
         self.board = Board(position=Point(x_shift, y_shift))
 
     def _init_players(self):
-        self.players = [RealPlayer(), NeuralNetwork()]
+        if self.spectator:
+            self.players = [self._ai_player(), self._ai_player()]
+        else:
+            self.players = [RealPlayer(), self._ai_player()]
 
         for i, player in enumerate(self.players):
-            is_real_player = player.is_real_player()
-            if is_real_player:
-                player.hand.set_dimension(SCREEN_WIDTH, Tile.SIZE * 6)
+            bottom_seat = i == REAL_PLAYER_NUMBER
+            if bottom_seat:
+                # Slots stop short of the buttons, which are drawn over the
+                # bottom right corner of the hand
+                width = (SCREEN_WIDTH if self.spectator
+                         else BUTTON_HOLDER_POSITION.x)
+                player.hand.set_dimension(width, Tile.SIZE * 6)
             else:
                 player.hand.set_dimension(SCREEN_WIDTH, Tile.SIZE * 2)
 
             player.hand.set_position(*PLAYER_POSITIONS[i])
             self.sprites.add(player.hand)
-            if not is_real_player:
+            if not bottom_seat:
                 player.hand.rotate()
 
             for _ in range(NUMBER_OF_TILES_IN_HAND):
                 self._add_new_tile_for_player(player)
 
+    def _ai_player(self):
+        if self.heuristic:
+            return HeuristicPlayer(self.heuristic)
+        return NeuralNetwork(self.policy)
+
     def _add_new_tile_for_player(self, player, tile_value=None):
         if not tile_value:
             tile_value = self._take_from_bazar()
         if not tile_value:
             raise RuntimeError('No tiles left')
 
-        tile = Tile(tile_value[0], tile_value[1],
-                    covered=(not player.is_real_player()))
+        covered = not (player.is_real_player() or self.spectator)
+        tile = Tile(tile_value[0], tile_value[1], covered=covered)
         player.hand.add_tile(tile)
+        if tracing.enabled:
+            tracing.record(tracing.BAZAR_DRAW, self.players.index(player),
+                           *tile_value, len(self.possible_tiles))
 
     def _init_buttons(self):
         buttons_holder = ButtonHolder('sprites/button_holder.png',
-                                      position=Point(SCREEN_WIDTH - 100,
-                                                     SCREEN_HEIGHT - 100))
+                                      position=BUTTON_HOLDER_POSITION)
 
         player = self.players[REAL_PLAYER_NUMBER]
         self.buttons = [
-            Button(player.hand.rotate_chosen_tile, ROTATE_BUTTON_FILEPATH,
-                   position=Point(5, 0)),
-            Button(player.ready, SUBMIT_BUTTON_FILEPATH,
-                   position=Point(5, 50)),
-            Button(self._take_from_bazar_for_player, BAZAR_FILEPATH,
-                   position=Point(55, 0))
+            Button(player.hand.rotate_chosen_tile, ROTATE_BUTTON_FILEPATH),
+            Button(player.ready, SUBMIT_BUTTON_FILEPATH),
+            Button(self._take_from_bazar_for_player, BAZAR_FILEPATH),
         ]
 
         for button in self.buttons:
@@ -161,13 +249,47 @@ class Game:
         for event in pg.event.get():
             self._handle_event(event)
 
-        self._handle_board_movement()
+        if self.spectator:
+            self._make_spectator_turns()
+        elif not self.finished():
+            self.make_turn()
 
-        if not self.finished():
+        pg.display.update(self._update_sprites())
+        if self.spectator:
+            self._clock.tick(SPECTATOR_FPS)
+
+    def _make_spectator_turns(self):
+        """Advance an AI only game by the current speed between two frames.
+
+        Frames are paced at SPECTATOR_FPS, a speed is the number of turns
+        made per frame. At the max speed turns are made until the next frame
+        is due, so rendering does not hold the game back.
+        """
+        if self.finished():
+            if self._finished_at is None:
+                self._finished_at = get_ticks()
+            pause = SPECTATOR_PAUSE_MS // self.speed if self.speed else 0
+            # A window closed in the same frame is not restarted
+            if self._running and get_ticks() - self._finished_at >= pause:
+                self._running = False
+                self.restart = True
+            return
+
+        if self.speed:
+            for _ in range(self.speed):
+                if self.finished():
+                    break
+                self.make_turn()
+            return
+
+        deadline = time.perf_counter() + 1 / SPECTATOR_FPS
+        while not self.finished() and time.perf_counter() < deadline:
             self.make_turn()
 
-        self._update_sprites()
-        pg.display.flip()
+    def _set_speed(self, speed):
+        self.speed = speed
+        text = f'Speed: {speed}x' if speed else 'Speed: max'
+        self._speed_text = self._make_text(text, SCREEN_WIDTH - 250, 10)
 
     def _handle_event(self, event):
         if event.type == pg.QUIT:
@@ -177,13 +299,43 @@ class Game:
                 self._running = False
                 self.restart = True
                 return
+            if event.key == pg.K_t and tracing.enabled:
+                self._dump_trace()
+            if event.key == pg.K_m:
+                self._log_memory()
+            if self.spectator and event.key in SPEED_LEVELS:
+                self._set_speed(SPEED_LEVELS[event.key])
         elif event.type == pg.MOUSEBUTTONDOWN:
             self._handle_mouse_down(event)
+        elif event.type == pg.MOUSEMOTION:
+            self._handle_board_movement(event)
+        elif event.type == pg.MOUSEWHEEL:
+            # Wheel events have no position, motion events keep it
+            position = self._mouse_position
+            hand = self.players[REAL_PLAYER_NUMBER].hand
+            if hand.in_it(position):
+                hand.scroll(-event.y)
+            else:
+                self.board.zoom_by(event.y, position)
+
+    def _dump_trace(self):
+        count = tracing.dump(self.trace_file)
+        LOG.info(f'{count} trace events written to {self.trace_file}')
+
+    def _log_memory(self):
+        # Not needed before the first frame
+        from memory import format_report, memory_report
+        hands = [player.hand for player in self.players]
+        for line in format_report(memory_report(self.board, hands, self)):
+            LOG.info(line)
 
     def _handle_mouse_down(self, mouse_button):
         def chose_tile_for_real_player(position):
             chosen_tile = None
             player = self.players[REAL_PLAYER_NUMBER]
+            # Tiles scrolled out of the hand can not be chosen
+            if not player.hand.in_it(position):
+                return
             for tile in player.hand.tiles:
                 if tile.in_it(position):
                     chosen_tile = tile
@@ -194,13 +346,11 @@ class Game:
         def chose_region_for_tile(position):
             chosen_tile = None
             chosen_rect = None
+            # Placements are kept in unscaled board coordinates
+            position = self.board.to_local(position)
             for tile in self.board.tiles:
-                tile_shift = tile.get_shift()
-                tile_shift = Point(tile_shift[0] - tile.rect.x,
-                                   tile_shift[1] - tile.rect.y)
-
                 for possible_rect in tile.possible_placements:
-                    if in_it(possible_rect, position, tile_shift):
+                    if in_it(possible_rect, position):
                         chosen_rect = possible_rect
                         break
                 if chosen_rect:
@@ -213,23 +363,24 @@ class Game:
             for button in self.buttons:
                 if button.in_it(pos):
                     button.press()
-
-        if mouse_button.button == MB_LEFT:
-            if self.turn_number == REAL_PLAYER_NUMBER:
+                    return True
+            return False
+
+        if mouse_button.button == MB_LEFT and not self.spectator:
+            # Buttons are drawn over the hand and the board, so they take
+            # the click first
+            if (not press_buttons(mouse_button.pos)
+                    and self.turn_number == REAL_PLAYER_NUMBER):
                 chose_tile_for_real_player(mouse_button.pos)
                 chose_region_for_tile(mouse_button.pos)
-            press_buttons(mouse_button.pos)
-        if mouse_button.button == MB_RIGHT:
-            self._mouse_position = pg.mouse.get_pos()
-
-    def _handle_board_movement(self):
-        pressed_mouse = pg.mouse.get_pressed()
-        # We want to react on right click, but pressed_mouse is zero indexed
-        if pressed_mouse[MB_RIGHT - 1]:
-            new_pos = pg.mouse.get_pos()
-            self.board.rect.move_ip(new_pos[0] - self._mouse_position[0],
-                                    new_pos[1] - self._mouse_position[1])
-            self._mouse_position = new_pos
+        self._mouse_position = mouse_button.pos
+
+    def _handle_board_movement(self, motion):
+        # Only the event is looked at, not the mouse state, so events posted
+        # by input_replay.py drag the board too. Buttons are zero indexed
+        if motion.buttons[MB_RIGHT - 1]:
+            self.board.rect.move_ip(*motion.rel)
+        self._mouse_position = motion.pos
 
     def make_turn(self):
         def player_needs_tile_or_skip():
@@ -266,6 +417,10 @@ class Game:
         self.board.place_tile(turn.tile, turn.old_tile, turn.possible_rect,
                               turn.rect.x, turn.rect.y)
         self.board.clear_area()
+        if tracing.enabled:
+            tracing.record(tracing.TURN, self.players.index(player),
+                           turn.tile.first, turn.tile.second,
+                           turn.rect.x, turn.rect.y)
 
     def _inc_turn_number(self, initial_number=None):
         if initial_number is not None:
@@ -297,16 +452,15 @@ class Game:
         if self._finished:
             return self._finished
 
+        winner = None
         for player in self.players:
             if not player.hand.tiles:
                 self._finished = True
-                if player.is_real_player():
-                    self.player_won()
-                else:
-                    self.player_lost()
-                return True
+                winner = player
+                self._announce_winner(player)
+                break
 
-        if not self.possible_tiles and not any(
+        if not self._finished and not self.possible_tiles and not any(
                 find_possible_turn(player.hand, self.board)
                 for player in self.players):
             # FISH
@@ -324,10 +478,8 @@ class Game:
                     players_with_minimum_points.append(player)
 
             if len(players_with_minimum_points) == 1:
-                if players_with_minimum_points[0].is_real_player():
-                    self.player_won()
-                else:
-                    self.player_lost()
+                winner = players_with_minimum_points[0]
+                self._announce_winner(winner)
             if len(players_with_minimum_points) > 1:
                 self.draw()
 
@@ -335,9 +487,36 @@ class Game:
             # Show all cards
             for player in self.players:
                 player.hand.uncover()
+            self._score_hand(winner)
 
         return self._finished
 
+    def _score_hand(self, winner):
+        seat = self.players.index(winner) if winner else None
+        pips = [sum(player.hand.tiles) for player in self.players]
+        record_hand(self.stats, self.match, seat, pips, self.players,
+                    self.max_pips, moves=len(self.board.tiles) - 1)
+
+        scores = ' : '.join(map(str, self.match.scores))
+        self._add_text(f'Score {scores} (to {self.match.target_score})')
+        if self.match.finished():
+            match_winner = self.players[self.match.winner()]
+            if self.spectator:
+                self._add_text(
+                    f'Player {self.match.winner() + 1} wins the match!')
+            elif match_winner.is_real_player():
+                self._add_text('You win the match!')
+            else:
+                self._add_text('You lose the match!')
+
+    def _announce_winner(self, player):
+        if self.spectator:
+            self._add_text(f'Player {self.players.index(player) + 1} wins!')
+        elif player.is_real_player():
+            self.player_won()
+        else:
+            self.player_lost()
+
     def player_won(self):
         self._add_text('You win!')
 
@@ -348,17 +527,57 @@ class Game:
         self._add_text('Fish!!!')
 
     def _add_text(self, text):
+        y = 100 + len(self.texts) * TEXT_LINE_HEIGHT
+        self.texts.append(self._make_text(text, 100, y))
+
+    def _make_text(self, text, x, y):
         text_surface = self.font.render(text, False, (0, 255, 0), (0, 0, 128))
         text = Printable.from_surface(text_surface)
-        text.set_position(100, 100)
-        self.texts.append(text)
+        text.set_position(x, y)
+        return text
 
     def _update_sprites(self):
+        """Redraw the parts of the screen which changed, return their rects.
+        """
+        if tracing.enabled:
+            start = time.perf_counter_ns()
+        dirty = []
+        drawn = {}
         for sprite in self.sprites:
-            sprite.rec_blit()
-            self.screen.blit(sprite.surf, sprite.rect)
-        for text in self.texts:
-            self.screen.blit(text.surf, text.rect)
+            for rect in sprite.rec_blit():
+                dirty.append(rect.move(sprite.rect.topleft))
+            drawn[sprite] = sprite.rect.copy()
+        texts = list(self.texts)
+        if self._speed_text:
+            texts.append(self._speed_text)
+        for text in texts:
+            drawn[text] = text.rect.copy()
+        # Moved, new and removed ones are redrawn where they were and are
+        for sprite, rect in drawn.items():
+            old_rect = self._drawn.pop(sprite, None)
+            if old_rect != rect:
+                dirty.append(rect)
+                if old_rect:
+                    dirty.append(old_rect)
+        dirty.extend(self._drawn.values())
+        self._drawn = drawn
+
+        screen_rect = self.screen.get_rect()
+        dirty = [rect for rect in (rect.clip(screen_rect) for rect in dirty)
+                 if rect]
+        if screen_rect in dirty:
+            dirty = [screen_rect]
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            for sprite in self.sprites:
+                self.screen.blit(sprite.surf, sprite.rect)
+            for text in texts:
+                self.screen.blit(text.surf, text.rect)
+        self.screen.set_clip(None)
+        if tracing.enabled:
+            tracing.record(tracing.RENDER, len(self.sprites),
+                           time.perf_counter_ns() - start)
+        return dirty
 
     def cleanup(self):
         # There is a known bug in pygame for Mac which resulted in unexpected
@@ -380,17 +599,121 @@ class Game:
         self.texts = None
         self.board.cleanup()
         self.board.kill()
+        # Buttons call back into the game, the board is freed with it
+        self.buttons = None
+        self.board = None
 
         self.screen = None
 
 
+def make_parser():
+    parser = argparse.ArgumentParser(description='My Domino')
+    parser.add_argument('--max-pips', type=int, choices=TILE_SETS,
+                        default=DOUBLE_SIX,
+                        help='play with a double-6, double-9 or double-12 set')
+    parser.add_argument('--spectator', action='store_true',
+                        help='watch AI players play against each other')
+    parser.add_argument('--tables', type=int,
+                        help='watch that many AI games at once in a grid')
+    parser.add_argument('--speed', choices=SPEED_NAMES, default='1',
+                        help='initial spectator speed, change it with 1, 2, 3')
+    parser.add_argument('--policy',
+                        help='weights of a trained policy for the AI players')
+    parser.add_argument('--heuristic',
+                        help='weights tuned by tune.py for the AI players')
+    parser.add_argument('--book',
+                        help='opening book built by build_book.py for the '
+                             'heuristic AI players (not with --policy)')
+    parser.add_argument('--trace', type=int, nargs='?',
+                        const=tracing.DEFAULT_SIZE, metavar='EVENTS',
+                        help='keep the last EVENTS game events, press T or '
+                             'crash to write them to --trace-file')
+    parser.add_argument('--trace-file', default=TRACE_FILE)
+    parser.add_argument('--target-score', type=int, default=TARGET_SCORE,
+                        help='hands are played until a player has that score')
+    parser.add_argument('--stats', default=STATS_FILE,
+                        help='SQLite database for the results of hands')
+    parser.add_argument('--no-stats', action='store_true',
+                        help='do not record results')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='log the time of every phase until the first '
+                             'frame')
+    return parser
+
+
 if __name__ == '__main__':
+    parser = make_parser()
+    args = parser.parse_args()
+    if args.heuristic and args.policy:
+        parser.error('--heuristic can not be used with --policy')
+    if args.book and args.policy:
+        parser.error('--book can not be used with --policy')
+    profile = StartupProfile() if args.profile_startup else None
+    if profile:
+        profile.mark('imports')
     init_logging()
-    pg.init()
-    clock = pg.time.Clock()
-    clock.tick(30)
-
-    new_game = True
-    while new_game:
-        game = Game()
-        new_game = game.run()
+    # Only what the game uses, pg.init() would start audio and joysticks too
+    pg.display.init()
+    if profile:
+        profile.mark('pygame init')
+
+    policy = heuristic = None
+    if args.policy:
+        # Needs numpy, which is not required to play without a policy
+        from policy import Policy
+        policy = Policy.load(args.policy)
+        if policy.max_pips != args.max_pips:
+            parser.error(f'{args.policy} is a double-{policy.max_pips} policy')
+    elif args.heuristic or args.book:
+        from book import OpeningBook
+        book = OpeningBook(args.book) if args.book else None
+        if book and book.max_pips != args.max_pips:
+            parser.error(f'{args.book} is a book for a '
+                         f'double-{book.max_pips} set')
+        if args.heuristic:
+            heuristic = Heuristic.load(args.heuristic)
+            if heuristic.max_pips != args.max_pips:
+                parser.error(f'{args.heuristic} is tuned for a '
+                             f'double-{heuristic.max_pips} set')
+            heuristic.book = book
+        else:
+            heuristic = Heuristic(max_pips=args.max_pips, book=book)
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    stats = None if args.no_stats else StatsStore(args.stats)
+    match = Match(target_score=args.target_score)
+    if profile:
+        profile.mark('stats')
+
+    speed = SPEED_NAMES[args.speed]
+    try:
+        if args.tables:
+            # Only needed for the grid
+            from tables import TableGrid
+            TableGrid(args.tables, args.max_pips, policy, speed,
+                      heuristic).run()
+            new_game = False
+        else:
+            new_game = True
+        while new_game:
+            if match.finished():
+                match = Match(target_score=args.target_score)
+            game = Game(max_pips=args.max_pips, spectator=args.spectator,
+                        speed=speed, policy=policy,
+                        trace_file=args.trace_file, match=match, stats=stats,
+                        profile=profile, heuristic=heuristic)
+            profile = None
+            new_game = game.run()
+            speed = game.speed
+            # Frees the board now instead of when the cyclic GC runs
+            game.cleanup()
+    except BaseException:
+        if tracing.enabled:
+            count = tracing.dump(args.trace_file)
+            LOG.error(f'{count} trace events written to {args.trace_file}')
+        raise
+    finally:
+        if stats:
+            stats.close()
@@ -0,0 +1,122 @@
+#! /usr/bin/python3
+"""Matches of several hands played to a target score.
+
+The winner of a hand scores the pips left in the other hands, nobody scores
+when a fish ends in a draw.
+
+    python3 match.py --matches 1000 --stats stats.db
+
+plays AI matches without a screen and records them in the stats database.
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+import pygame as pg
+
+from engine import HeadlessGame, HEADLESS_HAND
+from player import NeuralNetwork
+from stats import StatsStore, STATS_FILE, player_stats
+from utils import init_headless_display, DOUBLE_SIX, TILE_SETS
+
+TARGET_SCORE = 100
+
+
+def hand_points(winner, pips):
+    if winner is None:
+        return 0
+    return sum(pips) - pips[winner]
+
+
+class Match:
+    __slots__ = ('match_id', 'target_score', 'scores', 'hand_number')
+
+    def __init__(self, players=2, target_score=TARGET_SCORE):
+        self.match_id = uuid.uuid4().hex
+        self.target_score = target_score
+        self.scores = [0] * players
+        self.hand_number = 0
+
+    def add_hand(self, winner, pips):
+        """Score a finished hand, return the points of the winner."""
+        points = hand_points(winner, pips)
+        if winner is not None:
+            self.scores[winner] += points
+        self.hand_number += 1
+        return points
+
+    def finished(self):
+        return max(self.scores) >= self.target_score
+
+    def winner(self):
+        if not self.finished():
+            return None
+        return self.scores.index(max(self.scores))
+
+
+def record_hand(store, match, winner, pips, players, max_pips, moves=0):
+    """Score a hand in `match` and queue it in `store` if there is one.
+
+    Returns the points of the winner.
+    """
+    hand_number = match.hand_number
+    points = match.add_hand(winner, pips)
+    if not store:
+        return points
+
+    store.record_hand(match.match_id, hand_number, max_pips, [
+        (type(player).__name__, seat == winner, pips[seat],
+         points if seat == winner else 0)
+        for seat, player in enumerate(players)
+    ], moves)
+    if match.finished():
+        store.record_match(match)
+    return points
+
+
+def play_match(store, target_score=TARGET_SCORE, max_pips=DOUBLE_SIX,
+               rng=None):
+    match = Match(target_score=target_score)
+    while not match.finished():
+        players = [NeuralNetwork(**HEADLESS_HAND),
+                   NeuralNetwork(**HEADLESS_HAND)]
+        game = HeadlessGame(players, max_pips, rng=rng)
+        winner = game.play()
+        record_hand(store, match, winner, game.pips(), players, max_pips,
+                    game.moves)
+    return match
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--target-score', type=int, default=TARGET_SCORE)
+    parser.add_argument('--max-pips', type=int, default=DOUBLE_SIX,
+                        choices=TILE_SETS)
+    parser.add_argument('--stats', default=STATS_FILE)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    init_headless_display()
+
+    store = StatsStore(args.stats)
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    hands = 0
+    for _ in range(args.matches):
+        hands += play_match(store, args.target_score, args.max_pips,
+                            rng).hand_number
+    store.close()
+    elapsed = time.perf_counter() - start
+
+    print(f'{args.matches} matches, {hands} hands in {elapsed:.1f}s '
+          f'({hands / elapsed:.0f} hands/s)')
+    for row in player_stats(args.stats):
+        print(*row)
+    pg.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#! /usr/bin/python3
+"""Memory used by a game, broken down by subsystem.
+
+- board: the surface of the board,
+- hands: the surfaces of the hands,
+- sprite cache: every other surface sprites are drawn with, the cached
+  images and faces shared by tiles included, each counted once,
+- engine state: the Python objects of the game (tiles, players, bazar,
+  actions, collision grid...) without their surfaces.
+
+Press M in the game to log the report, or run
+
+    python3 memory.py --max-pips 12
+
+to play a game on a full size board without a screen and print it.
+"""
+
+import argparse
+import collections
+import os
+import random
+import sys
+import types
+
+import pygame as pg
+
+import printables
+from engine import HeadlessGame
+from player import NeuralNetwork
+from utils import init_headless_display, DOUBLE_SIX, TILE_SETS
+
+SUBSYSTEMS = ('board', 'hands', 'sprite cache', 'engine state')
+_ATOMIC = (type, types.ModuleType, types.FunctionType, types.MethodType,
+           types.BuiltinFunctionType, pg.Surface)
+
+
+def surface_bytes(surf):
+    return surf.get_pitch() * surf.get_height()
+
+
+def object_bytes(obj, seen=None):
+    """Size of `obj` and everything it refers to, surfaces, functions and
+    classes excluded."""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _ATOMIC):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for klass in type(obj).__mro__:
+            for name in getattr(klass, '__slots__', ()):
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return total
+
+
+def _sprite_surfaces(sprite):
+    yield sprite.surf
+    if sprite._scaled:
+        yield from sprite._scaled.values()
+    for child in sprite.sprites:
+        yield from _sprite_surfaces(child)
+
+
+def _cached_surfaces():
+    yield from printables._images.values()
+    yield from printables._rotated_images.values()
+    yield from printables._scaled_images.values()
+    yield from printables._tile_faces.values()
+    yield from printables._thumbnail_faces.values()
+
+
+def memory_report(board, hands, state):
+    """Bytes per subsystem of a game with `board`, `hands` and the engine
+    `state` (the game object)."""
+    counted = {id(board.surf), *(id(hand.surf) for hand in hands)}
+    sprite_cache = 0
+    surfaces = list(_cached_surfaces())
+    for sprite in [board, *hands]:
+        surfaces.extend(_sprite_surfaces(sprite))
+    for surf in surfaces:
+        if id(surf) not in counted:
+            counted.add(id(surf))
+            sprite_cache += surface_bytes(surf)
+
+    return {
+        'board': surface_bytes(board.surf),
+        'hands': sum(surface_bytes(hand.surf) for hand in hands),
+        'sprite cache': sprite_cache,
+        'engine state': object_bytes(state),
+    }
+
+
+def resident_bytes():
+    """Resident set size of the process, the peak one where the current one
+    is not known, None on systems without either (Windows)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_report(report):
+    lines = [f'{name:<14}{size / 2 ** 20:>9.2f} MB'
+             for name, size in report.items()]
+    lines.append(f'{"total":<14}{sum(report.values()) / 2 ** 20:>9.2f} MB')
+    rss = resident_bytes()
+    if rss is not None:
+        lines.append(f'{"process RSS":<14}{rss / 2 ** 20:>9.2f} MB')
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-pips', type=int, default=DOUBLE_SIX,
+                        choices=TILE_SETS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    init_headless_display()
+
+    players = [NeuralNetwork(), NeuralNetwork()]
+    game = HeadlessGame(players, args.max_pips, random.Random(args.seed),
+                        board=printables.Board())
+    game.play()
+    game.board.rec_blit()
+    for player in players:
+        player.hand.rec_blit()
+
+    hands = [player.hand for player in players]
+    for line in format_report(memory_report(game.board, hands, game)):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
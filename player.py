@@ -1,3 +1,4 @@
+from heuristic import Heuristic
 from printables import Hand, find_possible_turn
 from utils import Turn
 
@@ -5,6 +6,7 @@ MOVING = False
 
 
 class Player:
+    __slots__ = ('hand', '_ready')
     real_player = False
 
     def __init__(self, *args, **kwargs):
@@ -28,11 +30,34 @@ class Player:
 
 
 class NeuralNetwork(Player):
+    __slots__ = ('policy',)
+
+    def __init__(self, policy=None, *args, **kwargs):
+        super(NeuralNetwork, self).__init__(*args, **kwargs)
+        # Without a trained policy (see policy.py) the first possible turn is
+        # made
+        self.policy = policy
+
     def turn(self, board):
+        if self.policy:
+            return self.policy.choose_turn(self.hand, board)
         return find_possible_turn(self.hand, board)
 
 
+class HeuristicPlayer(Player):
+    __slots__ = ('heuristic',)
+
+    def __init__(self, heuristic=None, *args, **kwargs):
+        super(HeuristicPlayer, self).__init__(*args, **kwargs)
+        # Weights tuned by tune.py, the default ones are picked by hand
+        self.heuristic = heuristic or Heuristic()
+
+    def turn(self, board):
+        return self.heuristic.choose_turn(self.hand, board)
+
+
 class RealPlayer(Player):
+    __slots__ = ()
     real_player = True
 
     def turn(self, board):
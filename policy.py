@@ -0,0 +1,146 @@
+"""Feed-forward move policy for the `NeuralNetwork` player, evaluated with NumPy.
+
+A position is encoded from the point of view of the player to move: the tiles
+in its hand, the tiles on the board and the pips of the open ends. A move is
+a tile of the set together with the pip of the open end it is placed at, two
+moves per tile (see `move_index`). Of the open ends with that pip the tile
+goes to the first one it fits (see `find_all_placements`).
+"""
+
+import functools
+
+import numpy as np
+
+from printables import find_all_placements, make_turn, placement_pip
+from utils import make_tile_set, DOUBLE_SIX
+
+HIDDEN_SIZE = 64
+
+
+@functools.lru_cache(maxsize=None)
+def tile_indexes(max_pips=DOUBLE_SIX):
+    return {tile: i for i, tile in enumerate(make_tile_set(max_pips))}
+
+
+def tile_index(tile, max_pips=DOUBLE_SIX):
+    first, second = tile.first, tile.second
+    if first > second:
+        first, second = second, first
+    return tile_indexes(max_pips)[(first, second)]
+
+
+def move_index(tile, pip, max_pips=DOUBLE_SIX):
+    """Index of placing `tile` at an open end of `pip`, one of its pips."""
+    return 2 * tile_index(tile, max_pips) + (pip != min(tile.first,
+                                                         tile.second))
+
+
+def number_of_moves(max_pips=DOUBLE_SIX):
+    return 2 * len(tile_indexes(max_pips))
+
+
+def state_size(max_pips=DOUBLE_SIX):
+    return len(tile_indexes(max_pips)) * 2 + max_pips + 1
+
+
+def encode_state(hand, board, max_pips=DOUBLE_SIX, out=None):
+    """Encode a position as a uint8 vector of `state_size(max_pips)`."""
+    if out is None:
+        out = np.zeros(state_size(max_pips), dtype=np.uint8)
+    else:
+        out[:] = 0
+
+    tiles = len(tile_indexes(max_pips))
+    for tile in hand.tiles:
+        out[tile_index(tile, max_pips)] = 1
+    for tile in board.tiles:
+        out[tiles + tile_index(tile, max_pips)] = 1
+        for possible_rect in tile.possible_placements:
+            out[2 * tiles + placement_pip(tile, possible_rect.dir)] += 1
+    return out
+
+
+def legal_moves(hand, board, max_pips=DOUBLE_SIX):
+    """Map a move index to a turn for every tile of `hand` and pip of an open
+    end it can be placed at."""
+    moves = {}
+    for tile, rotations, area, normalized_rect in find_all_placements(
+            hand, board):
+        move = move_index(tile, placement_pip(area.tile, area.rect.dir),
+                          max_pips)
+        if move not in moves:
+            moves[move] = make_turn(tile, rotations, area, normalized_rect)
+    return moves
+
+
+def moves_mask(moves, max_pips=DOUBLE_SIX):
+    mask = np.zeros(number_of_moves(max_pips), dtype=bool)
+    mask[list(moves)] = True
+    return mask
+
+
+class Policy:
+    def __init__(self, w1, b1, w2, b2, max_pips=DOUBLE_SIX):
+        self.w1 = np.asarray(w1, dtype=np.float32)
+        self.b1 = np.asarray(b1, dtype=np.float32)
+        self.w2 = np.asarray(w2, dtype=np.float32)
+        self.b2 = np.asarray(b2, dtype=np.float32)
+        self.max_pips = max_pips
+
+        expected = (state_size(max_pips), number_of_moves(max_pips))
+        if (self.w1.shape[0], self.w2.shape[1]) != expected:
+            raise ValueError(
+                f'Weights of shape {self.w1.shape} x {self.w2.shape} do not '
+                f'fit a double-{max_pips} set')
+
+    @classmethod
+    def random(cls, max_pips=DOUBLE_SIX, hidden_size=HIDDEN_SIZE, seed=None):
+        rng = np.random.default_rng(seed)
+        inputs, outputs = state_size(max_pips), number_of_moves(max_pips)
+        return cls(rng.normal(0, 1 / np.sqrt(inputs), (inputs, hidden_size)),
+                   np.zeros(hidden_size),
+                   rng.normal(0, 1 / np.sqrt(hidden_size),
+                              (hidden_size, outputs)),
+                   np.zeros(outputs),
+                   max_pips)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            return cls(weights['w1'], weights['b1'], weights['w2'],
+                       weights['b2'], int(weights['max_pips']))
+
+    def save(self, path):
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2,
+                 max_pips=self.max_pips)
+
+    def scores(self, states, masks):
+        """Score every move of a batch of positions in one call.
+
+        Illegal moves get -inf, so an argmax over a row picks a legal move.
+        """
+        hidden = np.maximum(states @ self.w1 + self.b1, 0)
+        logits = hidden @ self.w2 + self.b2
+        return np.where(masks, logits, -np.inf)
+
+    def choose(self, states, masks, temperature=0.0, rng=None):
+        """Pick a move for every position, greedily or by sampling."""
+        scores = self.scores(states, masks)
+        if not temperature:
+            return scores.argmax(axis=1)
+
+        # Gumbel-max trick: samples from softmax(scores / temperature) and
+        # never picks an illegal move
+        rng = rng or np.random.default_rng()
+        noise = rng.gumbel(size=scores.shape)
+        return (scores / temperature + noise).argmax(axis=1)
+
+    def choose_turn(self, hand, board):
+        moves = legal_moves(hand, board, self.max_pips)
+        if not moves:
+            return None
+
+        state = encode_state(hand, board, self.max_pips)
+        mask = moves_mask(moves, self.max_pips)
+        move = self.choose(state[np.newaxis], mask[np.newaxis])[0]
+        return moves[int(move)]
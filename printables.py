@@ -1,5 +1,12 @@
+import os
+
 import pygame as pg
-from utils import Point, in_it, Orientation, Direction as Dir, Turn, get_sprite_path
+
+import tracing
+from utils import (
+    Point, in_it, Orientation, Direction as Dir, Turn, Placement,
+    get_sprite_path,
+)
 
 from pygame import Rect
 
@@ -14,20 +21,216 @@ AREA_FILEPATH = get_sprite_path('red_square')
 BOARD_FILEPATH = get_sprite_path('board')
 
 
+# Pip positions as fractions of a tile half. Layouts up to nine follow the
+# usual 3x3 grid, bigger values (double-twelve sets) use a 3x4 grid.
+_COLUMNS = (0.25, 0.5, 0.75)
+_ROWS_3 = (0.25, 0.5, 0.75)
+_ROWS_4 = (0.2, 0.4, 0.6, 0.8)
+PIP_LAYOUTS = {
+    0: (),
+    1: ((0.5, 0.5),),
+    2: ((0.25, 0.25), (0.75, 0.75)),
+    3: ((0.25, 0.25), (0.5, 0.5), (0.75, 0.75)),
+    4: ((0.25, 0.25), (0.75, 0.25), (0.25, 0.75), (0.75, 0.75)),
+    5: ((0.25, 0.25), (0.75, 0.25), (0.5, 0.5), (0.25, 0.75), (0.75, 0.75)),
+    6: tuple((x, y) for y in (0.25, 0.75) for x in _COLUMNS),
+    7: tuple((x, y) for y in (0.25, 0.75) for x in _COLUMNS) + ((0.5, 0.5),),
+    8: tuple((x, y) for y in _ROWS_3 for x in _COLUMNS if (x, y) != (0.5, 0.5)),
+    9: tuple((x, y) for y in _ROWS_3 for x in _COLUMNS),
+    10: tuple((x, y) for y in _ROWS_4 for x in (0.25, 0.75)) +
+        ((0.5, 0.3), (0.5, 0.7)),
+    11: tuple((x, y) for y in _ROWS_4 for x in _COLUMNS
+              if (x, y) != (0.5, 0.8)),
+    12: tuple((x, y) for y in _ROWS_4 for x in _COLUMNS),
+}
+
+TILE_COLOR = (255, 255, 255)
+TILE_BORDER_COLOR = (27, 27, 27)
+TILE_BORDER_CHOSEN_COLOR = (197, 10, 10)
+PIP_COLOR = (0, 0, 0)
+
+_tile_faces = {}
+
+
+def draw_tile_face(first, second, chosen=False, angle=0):
+    """Draw a tile face for values which have no sprite file, rotated by
+    `angle`.
+
+    Faces are cached, so callers must not draw on the returned surface.
+    """
+    key = (first, second, chosen, angle)
+    face = _tile_faces.get(key)
+    if face is not None:
+        return face
+    if angle:
+        face = _tile_faces[key] = pg.transform.rotate(
+            draw_tile_face(first, second, chosen), angle)
+        return face
+    if tracing.enabled:
+        tracing.record(tracing.CACHE_MISS, 'tile_face', key)
+
+    size = Tile.SIZE
+    face = pg.Surface((Tile.WIDTH, Tile.HEIGHT))
+    face.fill(TILE_COLOR)
+    border_color = TILE_BORDER_CHOSEN_COLOR if chosen else TILE_BORDER_COLOR
+    pg.draw.rect(face, border_color, face.get_rect(), 2)
+    pg.draw.line(face, TILE_BORDER_COLOR, (size, 2), (size, size - 3))
+
+    radius = max(2, size // (14 if max(first, second) > 9 else 12))
+    for half, value in enumerate((first, second)):
+        for x, y in PIP_LAYOUTS[value]:
+            pg.draw.circle(face, PIP_COLOR,
+                           (int(half * size + x * size), int(y * size)),
+                           radius)
+
+    _tile_faces[key] = face
+    return face
+
+
+def placement_pip(tile, direction):
+    """Pip value a new tile has to match to be placed at `direction`."""
+    if direction in (Dir.TO_RIGHT, Dir.TO_BOTTOM):
+        return tile.second
+    return tile.first
+
+
+class _TileProbe:
+    """Attributes of a tile `Board.is_valid_turn` looks at, without a surface.
+
+    Rotates the same way `Tile.rotate` does, so the n-th probe rotation
+    matches n rotations of a fresh `Tile`.
+    """
+    __slots__ = ('first', 'second', 'double', 'orientation', '_angle')
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        self.double = first == second
+        self.orientation = Orientation.HORIZONTAL
+        self._angle = 0
+
+    def rotate(self):
+        self._angle = (self._angle + 90) % 360
+        if self._angle in (90, 270):
+            self.first, self.second = self.second, self.first
+        if self.orientation == Orientation.HORIZONTAL:
+            self.orientation = Orientation.VERTICAL
+        else:
+            self.orientation = Orientation.HORIZONTAL
+
+
+_images = {}
+
+
+def load_image(path):
+    """Load a sprite once, callers get the cached surface and must copy it
+    before drawing on it."""
+    image = _images.get(path)
+    if image is None:
+        if tracing.enabled:
+            tracing.record(tracing.CACHE_MISS, 'image', path)
+        image = _images[path] = pg.image.load(path).convert()
+    return image
+
+
+_rotated_images = {}
+
+
+def rotated_image(path, angle):
+    """`load_image` rotated by `angle`, cached like it."""
+    if not angle:
+        return load_image(path)
+    key = (path, angle)
+    image = _rotated_images.get(key)
+    if image is None:
+        image = _rotated_images[key] = pg.transform.rotate(load_image(path),
+                                                           angle)
+    return image
+
+
+_scaled_images = {}
+
+
 # Does not actually belong here
 def find_possible_turn(hand, board):
-    for tile in hand.tiles:
-        rotated_tile = Tile(tile.first, tile.second)
-        for _ in range(4):
-            for board_tile in board.tiles:
-                for possible_rect in board_tile.possible_placements:
-                    area = Area(tile=board_tile, rect=possible_rect)
-                    normalized_rect = board.is_valid_turn(rotated_tile, area)
-                    if normalized_rect:
-                        return Turn(rotated_tile, area.tile, normalized_rect,
-                                    area.rect, tile)
-            rotated_tile.rotate()
-    return None
+    return next(find_possible_turns(hand, board), None)
+
+
+def find_possible_turns(hand, board):
+    """Yield the first valid turn for every tile of `hand` which can be placed.
+    """
+    open_ends = _open_ends(hand, board)
+    if not open_ends:
+        return
+
+    for tile in list(hand.tiles):
+        for rotations, area, normalized_rect in _valid_placements(
+                tile, board, open_ends):
+            yield make_turn(tile, rotations, area, normalized_rect)
+            break
+
+
+def find_all_placements(hand, board):
+    """Yield (tile, rotations, area, normalized_rect) for every open end each
+    tile of `hand` can be placed at.
+
+    No tiles are created, `make_turn` turns the chosen placement into a turn.
+    """
+    open_ends = _open_ends(hand, board)
+    if not open_ends:
+        return
+
+    for tile in list(hand.tiles):
+        for placement in _valid_placements(tile, board, open_ends):
+            yield (tile,) + placement
+
+
+def make_turn(tile, rotations, area, normalized_rect):
+    rotated_tile = Tile(tile.first, tile.second)
+    for _ in range(rotations):
+        rotated_tile.rotate()
+    return Turn(rotated_tile, area.tile, normalized_rect, area.rect, tile)
+
+
+def _open_ends(hand, board):
+    open_ends = [
+        (placement_pip(board_tile, possible_rect.dir),
+         Placement(board_tile, possible_rect))
+        for board_tile in board.tiles
+        for possible_rect in board_tile.possible_placements
+    ]
+    if tracing.enabled:
+        tracing.record(tracing.MOVE_GENERATION, len(hand.tiles),
+                       len(open_ends), _count_candidates(hand, open_ends))
+    return open_ends
+
+
+def _count_candidates(hand, open_ends):
+    return sum(1 for tile in hand.tiles for pip, _ in open_ends
+               if pip == tile.first or pip == tile.second)
+
+
+def _valid_placements(tile, board, open_ends):
+    """Yield (rotations, area, normalized_rect) once per area `tile` fits.
+
+    Rotations are tried before areas, so the first placement is the one
+    `find_possible_turn` has always made.
+    """
+    placements = [placement for pip, placement in open_ends
+                  if pip == tile.first or pip == tile.second]
+    if not placements:
+        return
+
+    probe = _TileProbe(tile.first, tile.second)
+    for rotations in range(4):
+        for i, area in enumerate(placements):
+            if area is None:
+                continue
+            normalized_rect = board.is_valid_turn(probe, area)
+            if normalized_rect:
+                placements[i] = None
+                yield rotations, area, normalized_rect
+        probe.rotate()
 
 
 class Printable(pg.sprite.Sprite):
@@ -36,17 +239,22 @@ class Printable(pg.sprite.Sprite):
     default_color = 'black'
     WIDTH = 50
     HEIGHT = 50
+    # A leaf has no sprites and never draws on its surface, so leaves with
+    # the same image share one cached surface
+    LEAF = False
 
     def __init__(self, filename=None, parent=None, position=Point(0, 0),
                  default_color=None, width=None, height=None):
         super(Printable, self).__init__()
-        self.sprites = pg.sprite.Group()
+        self.sprites = () if self.LEAF else pg.sprite.Group()
         self.parent = parent
         self.rect = None
         self.surf = None
         self.chosen = False
         self._angle = 0
         self._image_set = None
+        self._scaled_source = None
+        self._scaled = None
         if default_color:
             self.default_color = default_color
 
@@ -79,25 +287,72 @@ class Printable(pg.sprite.Sprite):
         self._set_surface()
 
     def rotate(self):
+        old_rect = self.rect
         self._angle = (self._angle + 90) % 360
+        if self.LEAF and self._image_set:
+            self._set_surface(self._image_set)
+            return
         self.surf = pg.transform.rotate(self.surf, 90)
         self.rect = self.surf.get_rect(left=self.rect.left, top=self.rect.top)
+        self._changed(old_rect)
 
     def is_chosen(self):
         return self.chosen
 
     def rec_blit(self):
+        """Draw the sprites, return the regions of the surface redrawn."""
         self.fill_default()
         for sprite in self.sprites:
             sprite.rec_blit()
             self.surf.blit(sprite.surf, sprite.rect)
+        return [self.surf.get_rect()]
+
+    def scaled(self, zoom):
+        """Surface scaled by `zoom`, cached per zoom level until it changes."""
+        if zoom == 1:
+            return self.surf
+        if self.LEAF and self._image_set:
+            return self._scaled_shared(zoom)
+        if self._scaled_source is not self.surf:
+            self._scaled_source = self.surf
+            self._scaled = {}
+
+        surf = self._scaled.get(zoom)
+        if surf is None:
+            if tracing.enabled:
+                tracing.record(tracing.CACHE_MISS, 'scaled', zoom)
+            width, height = self.surf.get_size()
+            surf = pg.transform.smoothscale(
+                self.surf, (round(width * zoom), round(height * zoom)))
+            self._scaled[zoom] = surf
+        return surf
+
+    def _scaled_shared(self, zoom):
+        key = (self._image_set, self._angle, zoom)
+        surf = _scaled_images.get(key)
+        if surf is None:
+            if tracing.enabled:
+                tracing.record(tracing.CACHE_MISS, 'scaled', zoom)
+            width, height = self.surf.get_size()
+            surf = _scaled_images[key] = pg.transform.smoothscale(
+                self.surf, (round(width * zoom), round(height * zoom)))
+        return surf
 
     def fill_default(self):
         if not self._image_set:
             self.surf.fill(pg.Color(self.default_color))
 
     def set_position(self, x, y):
+        old_rect = self.rect.copy()
         self.rect.move_ip(-self.rect.x + x, -self.rect.y + y)
+        self._changed(old_rect)
+
+    def _changed(self, old_rect):
+        if self.parent is not None:
+            self.parent.child_changed(self, old_rect)
+
+    def child_changed(self, child, old_rect):
+        """Called when a sprite of this one moved or got a new surface."""
 
     def _set_surface(self, filename=None, surf=None):
         sprite_path = filename or self.sprite_file
@@ -106,8 +361,12 @@ class Printable(pg.sprite.Sprite):
             self.surf = surf
         else:
             try:
-                self.surf = pg.image.load(sprite_path).convert()
-                self.surf = pg.transform.rotate(self.surf, self._angle)
+                if self.LEAF:
+                    self.surf = rotated_image(sprite_path, self._angle)
+                else:
+                    # rotate() makes a copy even for 0 degrees
+                    self.surf = pg.transform.rotate(load_image(sprite_path),
+                                                    self._angle)
             except Exception:
                 self.surf = pg.Surface((self.width, self.height))
                 self.fill_default()
@@ -117,6 +376,7 @@ class Printable(pg.sprite.Sprite):
         old_rect = self.rect
         if old_rect:
             self.rect = self.surf.get_rect(left=old_rect.left, top=old_rect.top)
+            self._changed(old_rect)
         else:
             self.rect = self.surf.get_rect()
 
@@ -152,11 +412,159 @@ class Printable(pg.sprite.Sprite):
             if hasattr(sprite, 'cleanup'):
                 sprite.cleanup()
             sprite.kill()
-        self.sprites.empty()
+            sprite.parent = None
+        if not self.LEAF:
+            self.sprites.empty()
         self.kill()
 
 
+class SlotLayout:
+    """Places items into slots of the same size, row by row or, when
+    `vertical`, column by column.
+
+    Slot positions follow from the item indexes, so adding an item places
+    only it and removing one moves only the items after it. Lines (rows or
+    columns) which do not fit are reached by scrolling.
+    """
+
+    __slots__ = ('slot_width', 'slot_height', 'origin', 'vertical', 'items',
+                 'per_line', 'visible_lines', 'scroll_offset')
+
+    def __init__(self, slot_width, slot_height, origin=Point(0, 0),
+                 vertical=False):
+        self.slot_width = slot_width
+        self.slot_height = slot_height
+        self.origin = origin
+        self.vertical = vertical
+        self.items = []
+        self.per_line = 1
+        self.visible_lines = 1
+        self.scroll_offset = 0
+
+    def resize(self, width, height):
+        width -= self.origin.x
+        height -= self.origin.y
+        if self.vertical:
+            self.per_line = max(1, height // self.slot_height)
+            self.visible_lines = max(1, width // self.slot_width)
+        else:
+            self.per_line = max(1, width // self.slot_width)
+            self.visible_lines = max(1, height // self.slot_height)
+        self._place(0)
+
+    def position(self, index):
+        line, slot = divmod(index, self.per_line)
+        line -= self.scroll_offset
+        if self.vertical:
+            return Point(self.origin.x + line * self.slot_width,
+                         self.origin.y + slot * self.slot_height)
+        return Point(self.origin.x + slot * self.slot_width,
+                     self.origin.y + line * self.slot_height)
+
+    def _place(self, start):
+        for index in range(start, len(self.items)):
+            self.items[index].set_position(*self.position(index))
+
+    def append(self, item):
+        self.items.append(item)
+        self._place(len(self.items) - 1)
+
+    def remove(self, item):
+        index = self.items.index(item)
+        del self.items[index]
+        # Lines scrolled past must not be left empty when the items shrink
+        offset = min(self.scroll_offset,
+                     max(0, self.lines() - self.visible_lines))
+        if offset != self.scroll_offset:
+            self.scroll_offset = offset
+            index = 0
+        self._place(index)
+
+    def lines(self):
+        return -(-len(self.items) // self.per_line)
+
+    def scroll(self, lines):
+        max_offset = max(0, self.lines() - self.visible_lines)
+        offset = min(max(self.scroll_offset + lines, 0), max_offset)
+        if offset != self.scroll_offset:
+            self.scroll_offset = offset
+            self._place(0)
+
+
+class Container(Printable):
+    """Printable whose sprites are placed by a `SlotLayout`.
+
+    Only the regions where sprites moved or changed their surface are
+    redrawn, the rest of the surface is kept from the previous frame.
+    """
+    SLOT_WIDTH = 50
+    SLOT_HEIGHT = 50
+    SLOT_ORIGIN = Point(0, 0)
+    VERTICAL = False
+
+    def __init__(self, *args, **kwargs):
+        self.layout = SlotLayout(self.SLOT_WIDTH, self.SLOT_HEIGHT,
+                                 self.SLOT_ORIGIN, self.VERTICAL)
+        self._dirty = []
+        self._redraw = True
+        super(Container, self).__init__(*args, **kwargs)
+
+    def add_sprite(self, sprite):
+        super(Container, self).add_sprite(sprite)
+        self.layout.append(sprite)
+        self._dirty.append(sprite.rect.copy())
+
+    def remove_sprite(self, sprite):
+        if sprite not in self.sprites:
+            return
+        self._dirty.append(sprite.rect.copy())
+        self.sprites.remove(sprite)
+        sprite.parent = None
+        self.layout.remove(sprite)
+
+    def scroll(self, lines):
+        self.layout.scroll(lines)
+
+    def child_changed(self, child, old_rect):
+        self._dirty.append(old_rect.union(child.rect))
+
+    def rotate(self):
+        super(Container, self).rotate()
+        self.layout.resize(self.rect.width, self.rect.height)
+        self._redraw = True
+
+    def _set_surface(self, filename=None, surf=None):
+        super(Container, self)._set_surface(filename, surf)
+        self.layout.resize(self.rect.width, self.rect.height)
+        self._redraw = True
+
+    def rec_blit(self):
+        if self._redraw:
+            self._redraw = False
+            self._dirty = []
+            return super(Container, self).rec_blit()
+
+        dirty, self._dirty = self._dirty, []
+        for rect in dirty:
+            self.surf.set_clip(rect)
+            self.fill_default()
+            for sprite in self.sprites:
+                if sprite.rect.colliderect(rect):
+                    sprite.rec_blit()
+                    self.surf.blit(sprite.surf, sprite.rect)
+        self.surf.set_clip(None)
+        return dirty
+
+    def cleanup(self):
+        super(Container, self).cleanup()
+        # The layout refers to the sprites, which referred to this one
+        self.layout.items = []
+        self._dirty = []
+
+
 class MyRect(Rect):
+    __slots__ = ('dir',)
+
     def __init__(self, dir, *args, **kwargs):
         super(MyRect, self).__init__(*args, **kwargs)
         self.dir = dir
@@ -168,6 +576,9 @@ class Tile(Printable):
     WIDTH = 100
     HEIGHT = 50
     SIZE = 50
+    LEAF = True
+
+    _face = None
 
     def __init__(self, first=0, second=0, covered=False, *args, **kwargs):
         super(Tile, self).__init__(*args, **kwargs)
@@ -211,12 +622,25 @@ class Tile(Printable):
         self._set_surface()
 
     def uncover(self):
+        self._face = (self.first, self.second)
         self.sprite_file = get_sprite_path(
             TILE_FILE_PATTERN.format(self.first, self.second))
         self.sprite_file_chosen = get_sprite_path(
             TILE_FILE_CHOSEN_PATTERN.format(self.first, self.second))
         self._set_surface()
 
+    def _set_surface(self, filename=None, surf=None):
+        sprite_path = filename or self.sprite_file
+        if surf or not self._face or os.path.isfile(sprite_path):
+            super(Tile, self)._set_surface(filename, surf)
+            return
+
+        # Only the double-six set has sprites, draw the others
+        chosen = sprite_path == self.sprite_file_chosen
+        super(Tile, self)._set_surface(
+            surf=draw_tile_face(*self._face, chosen=chosen, angle=self._angle))
+        self._image_set = sprite_path
+
     def rotate(self):
         super(Tile, self).rotate()
 
@@ -273,10 +697,12 @@ class Tile(Printable):
             self.possible_placements.remove(possible_placement)
 
 
-class Hand(Printable):
+class Hand(Container):
     default_sprite = HAND_FILEPATH
     WIDTH = 700
     HEIGHT = 300
+    SLOT_WIDTH = 100
+    SLOT_HEIGHT = 100
 
     def __init__(self, *args, **kwargs):
         super(Hand, self).__init__(*args, **kwargs)
@@ -287,34 +713,17 @@ class Hand(Printable):
         return self.sprites
 
     def add_tile(self, tile):
-        if self.tiles:
-            max_tile = max(self.tiles, key=lambda x: (x.rect.y, x.rect.x))
-            new_x, new_y = max_tile.rect.x + Tile.WIDTH, max_tile.rect.y
-        else:
-            new_x, new_y = 0, 0
-
-        if new_x >= self.rect.width:
-            new_x = 0
-            new_y += Tile.SIZE * 2
-
-        tile.set_position(new_x, new_y)
         self.add_sprite(tile)
 
     def remove_tile(self, tile):
-        try:
-            tile.unchose()
-            if self.chosen_tile == tile:
-                self.chosen_tile = None
-            self.tiles.remove(tile)
-        except ValueError:
-            pass
-        else:
-            # To keep hand dense by replacing tiles in it
-            tiles = self.tiles.copy()
-            self.tiles.empty()
+        if tile not in self.tiles:
+            return
 
-            for tile in tiles:
-                self.add_tile(tile)
+        tile.unchose()
+        if self.chosen_tile == tile:
+            self.chosen_tile = None
+        # The layout moves the tiles after it to keep the hand dense
+        self.remove_sprite(tile)
 
     def chose_tile(self, chosen_tile):
         if self.chosen_tile:
@@ -355,13 +764,81 @@ class Board(Printable):
     default_color = 'beige'
     WIDTH = 4000
     HEIGHT = 4000
+    # Side of a square of the collision grid, tiles are indexed by the cells
+    # they cover, so a collision check only looks at the tiles nearby
+    CELL_SIZE = 100
+    # Multiples of 0.2 keep tiles (and their half size shifts) on whole pixels
+    ZOOM_LEVELS = (0.2, 0.4, 0.6, 0.8, 1.0)
 
     def __init__(self, *args, **kwargs):
         super(Board, self).__init__(*args, **kwargs)
+        self.zoom = 1.0
         self.chosen_area = None
         self.chosen_tile = None
         self.chosen_rect = None
         self.tiles = pg.sprite.Group()
+        self._cells = {}
+        self._redraw = True
+
+    def _cells_for(self, rect):
+        size = self.CELL_SIZE
+        for cell_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cell_y in range(rect.top // size,
+                                (rect.bottom - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def add_sprite(self, sprite):
+        super(Board, self).add_sprite(sprite)
+        self._redraw = True
+
+    def child_changed(self, child, old_rect):
+        self._redraw = True
+
+    def _set_surface(self, filename=None, surf=None):
+        super(Board, self)._set_surface(filename, surf)
+        self._redraw = True
+
+    def rec_blit(self):
+        # Redrawn as a whole, but only when a tile or the area changed
+        if not self._redraw:
+            return []
+        self._redraw = False
+        if self.zoom == 1:
+            return super(Board, self).rec_blit()
+
+        self.fill_default()
+        zoom = self.zoom
+        for sprite in self.sprites:
+            sprite.rec_blit()
+            rect = sprite.rect
+            self.surf.blit(sprite.scaled(zoom),
+                           (round(rect.x * zoom), round(rect.y * zoom)))
+        return [self.surf.get_rect()]
+
+    def zoom_by(self, steps, center):
+        """Change the zoom level by `steps`, keeping `center` in place."""
+        level = self.ZOOM_LEVELS.index(self.zoom) + steps
+        level = min(max(level, 0), len(self.ZOOM_LEVELS) - 1)
+        zoom = self.ZOOM_LEVELS[level]
+        if zoom == self.zoom:
+            return
+
+        local = self.to_local(center)
+        self.zoom = zoom
+        self.set_dimension(round(self.WIDTH * zoom), round(self.HEIGHT * zoom))
+        self.set_position(center[0] - local.x * zoom,
+                          center[1] - local.y * zoom)
+
+    def cleanup(self):
+        super(Board, self).cleanup()
+        self.tiles.empty()
+        self._cells = {}
+        self.chosen_area = self.chosen_tile = self.chosen_rect = None
+
+    def to_local(self, position):
+        """Convert a screen position into a position on the unscaled board."""
+        return Point((position[0] - self.rect.x) / self.zoom,
+                     (position[1] - self.rect.y) / self.zoom)
 
     def chose_area(self, chosen_tile, chosen_rect):
         self.clear_area()
@@ -372,6 +849,7 @@ class Board(Printable):
         if self.chosen_area:
             self.chosen_area.kill()
             self.chosen_area = None
+            self._redraw = True
 
     def place_tile(self, tile, next_to_tile, possible_rect, x, y):
         self.clear_area()
@@ -382,6 +860,8 @@ class Board(Printable):
         self.add_sprite(tile)
         self.tiles.add(tile)
         tile.set_position(x, y)
+        for cell in self._cells_for(tile.rect):
+            self._cells.setdefault(cell, []).append(tile)
         tile.make_possible_placements()
         if possible_rect:
             tile.remove_possible_placements_by_dir(
@@ -482,14 +962,21 @@ class Board(Printable):
         inflated_rect = Rect(new_tile_rect.x - 1, new_tile_rect.y - 1,
                              new_tile_rect.width + 2, new_tile_rect.height + 2)
 
-        return inflated_rect.collidelist([
-            tile.rect for tile in self.tiles if tile not in except_for]) != -1
+        for cell in self._cells_for(inflated_rect):
+            for tile in self._cells.get(cell, ()):
+                if (tile not in except_for and
+                        inflated_rect.colliderect(tile.rect)):
+                    return True
+        return False
 
 
-class ButtonHolder(Printable):
+class ButtonHolder(Container):
     default_color = 'cornflowerblue'
     HEIGHT = 100
     WIDTH = 150
+    # Buttons go top to bottom, then to the next column
+    SLOT_ORIGIN = Point(5, 0)
+    VERTICAL = True
 
 
 class Button(Printable):
@@ -501,3 +988,48 @@ class Button(Printable):
     def press(self):
         self.callback()
         self.pressed = not self.pressed
+
+
+# Zoom levels of thumbnails, the biggest one a board fits in is used
+THUMBNAIL_ZOOMS = (0.05, 0.1, 0.2, 0.4)
+THUMBNAIL_MARGIN = 4
+
+_thumbnail_faces = {}
+
+
+def thumbnail_face(tile, zoom):
+    """Scaled tile surface shared by every tile looking the same."""
+    key = (tile._image_set, tile._angle, zoom)
+    face = _thumbnail_faces.get(key)
+    if face is None:
+        if tracing.enabled:
+            tracing.record(tracing.CACHE_MISS, 'thumbnail_face', key)
+        width, height = tile.surf.get_size()
+        face = pg.transform.smoothscale(
+            tile.surf, (max(1, round(width * zoom)),
+                        max(1, round(height * zoom))))
+        _thumbnail_faces[key] = face
+    return face
+
+
+def draw_board_thumbnail(board, surf):
+    """Draw the tiles of `board` centered and scaled to fit into `surf`."""
+    surf.fill(pg.Color(Board.default_color))
+    tiles = list(board.tiles)
+    if not tiles:
+        return
+
+    bounds = tiles[0].rect.unionall([tile.rect for tile in tiles])
+    width = surf.get_width() - THUMBNAIL_MARGIN * 2
+    height = surf.get_height() - THUMBNAIL_MARGIN * 2
+    zoom = THUMBNAIL_ZOOMS[0]
+    for level in THUMBNAIL_ZOOMS:
+        if bounds.width * level <= width and bounds.height * level <= height:
+            zoom = level
+
+    x_shift = (surf.get_width() - bounds.width * zoom) / 2
+    y_shift = (surf.get_height() - bounds.height * zoom) / 2
+    for tile in tiles:
+        surf.blit(thumbnail_face(tile, zoom),
+                  (round(x_shift + (tile.rect.x - bounds.x) * zoom),
+                   round(y_shift + (tile.rect.y - bounds.y) * zoom)))
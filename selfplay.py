@@ -0,0 +1,305 @@
+#! /usr/bin/python3
+"""Generate self-play records for training the `NeuralNetwork` policy.
+
+Every record is a position seen by the player to move: the state encoding,
+the mask of legal moves, the chosen move and the outcome of the game for that
+player (1 win, 0 draw, -1 loss). Records go to memory-mapped NumPy shards:
+
+    <directory>/manifest.json
+    <directory>/shard_00000/{states,masks,moves,outcomes}.npy
+
+A shard is listed in the manifest only when it is full, so an interrupted run
+is resumed by running the same command again.
+
+    python3 selfplay.py data/ --games 100000 --policy policy.npz
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+import pygame as pg
+
+from engine import HeadlessGame, HEADLESS_HAND
+from player import NeuralNetwork
+from policy import (
+    Policy, encode_state, legal_moves, moves_mask, number_of_moves,
+    state_size,
+)
+from utils import init_headless_display, DOUBLE_SIX, TILE_SETS
+
+MANIFEST = 'manifest.json'
+SHARD_PATTERN = 'shard_{:05d}'
+FIELDS = ('states', 'masks', 'moves', 'outcomes')
+
+
+class SelfPlay:
+    """Plays `parallel` games at once, so all positions waiting for a move
+    are scored by the policy in one batched call.
+    """
+
+    def __init__(self, policy=None, max_pips=DOUBLE_SIX, parallel=64, seed=0,
+                 first_game=0, temperature=1.0):
+        self.policy = policy
+        self.max_pips = max_pips
+        self.parallel = parallel
+        self.seed = seed
+        self.temperature = temperature
+        # Games are dealt from their own seed, so a resumed run does not
+        # replay the games of the previous one
+        self.next_game = first_game
+        self._rng = np.random.default_rng([seed, first_game])
+
+    def _new_table(self):
+        game = HeadlessGame([NeuralNetwork(**HEADLESS_HAND),
+                             NeuralNetwork(**HEADLESS_HAND)], self.max_pips,
+                            rng=random.Random(f'{self.seed}-{self.next_game}'))
+        self.next_game += 1
+        return game, []
+
+    def _legal_moves(self, game):
+        """Take tiles or pass until the player to move has a legal move."""
+        while not game.finished():
+            moves = legal_moves(game.current_player.hand, game.board,
+                                self.max_pips)
+            if moves:
+                return moves
+            game.draw_or_pass()
+        return None
+
+    def _choose(self, states, masks):
+        if self.policy:
+            return self.policy.choose(states, masks, self.temperature,
+                                      self._rng)
+        # Uniformly random legal moves
+        noise = self._rng.random(masks.shape)
+        return np.where(masks, noise, -1).argmax(axis=1)
+
+    def games(self):
+        """Yield the records of finished games, forever."""
+        tables = [self._new_table() for _ in range(self.parallel)]
+        states = np.zeros((self.parallel, state_size(self.max_pips)),
+                          dtype=np.uint8)
+        masks = np.zeros((self.parallel, number_of_moves(self.max_pips)),
+                         dtype=bool)
+
+        while True:
+            waiting = []
+            for i in range(self.parallel):
+                moves = self._legal_moves(tables[i][0])
+                while moves is None:
+                    yield _game_records(*tables[i])
+                    tables[i] = self._new_table()
+                    moves = self._legal_moves(tables[i][0])
+
+                game = tables[i][0]
+                encode_state(game.current_player.hand, game.board,
+                             self.max_pips, out=states[i])
+                masks[i] = moves_mask(moves, self.max_pips)
+                waiting.append(moves)
+
+            chosen = self._choose(states, masks)
+            for i, moves in enumerate(waiting):
+                game, records = tables[i]
+                move = int(chosen[i])
+                records.append((states[i].copy(), masks[i].copy(), move,
+                                game.turn_number))
+                game.play_turn(moves[move])
+
+
+def _game_records(game, records):
+    winner = game.winner()
+    outcomes = [0 if winner is None else (1 if player == winner else -1)
+                for _, _, _, player in records]
+    return (np.array([record[0] for record in records]),
+            np.array([record[1] for record in records]),
+            np.array([record[2] for record in records], dtype=np.int16),
+            np.array(outcomes, dtype=np.int8))
+
+
+class ShardWriter:
+    def __init__(self, directory, max_pips=DOUBLE_SIX, shard_size=100000):
+        self.directory = directory
+        self.max_pips = max_pips
+        self.shard_size = shard_size
+        os.makedirs(directory, exist_ok=True)
+
+        self.manifest = read_manifest(directory) or {
+            'max_pips': max_pips,
+            'moves': number_of_moves(max_pips),
+            'shard_size': shard_size,
+            'games': 0,
+            'next_game': 0,
+            'records': 0,
+            'shards': [],
+        }
+        if self.manifest['max_pips'] != max_pips:
+            raise ValueError(
+                f'{directory} holds double-{self.manifest["max_pips"]} '
+                f'records, not double-{max_pips}')
+        # Manifests without it hold one move per tile, not per open end
+        if self.manifest.get('moves') != number_of_moves(max_pips):
+            raise ValueError(f'{directory} holds records of another move '
+                             'encoding, start a new directory')
+        self.shard_size = self.manifest['shard_size']
+
+        self._games = 0
+        self._length = 0
+        self._arrays = None
+
+    @property
+    def games(self):
+        return self.manifest['games'] + self._games
+
+    def _open_shard(self):
+        path = os.path.join(self.directory,
+                            SHARD_PATTERN.format(len(self.manifest['shards'])))
+        os.makedirs(path, exist_ok=True)
+        shapes = {
+            'states': ((self.shard_size, state_size(self.max_pips)), np.uint8),
+            'masks': ((self.shard_size, number_of_moves(self.max_pips)), bool),
+            'moves': ((self.shard_size,), np.int16),
+            'outcomes': ((self.shard_size,), np.int8),
+        }
+        self._arrays = {
+            field: np.lib.format.open_memmap(
+                os.path.join(path, field + '.npy'), mode='w+',
+                dtype=dtype, shape=shape)
+            for field, (shape, dtype) in shapes.items()
+        }
+        self._length = 0
+        self._games = 0
+
+    def write_game(self, records):
+        length = len(records[0])
+        if length > self.shard_size:
+            raise ValueError(f'A game of {length} positions does not fit '
+                             f'a shard of {self.shard_size}')
+
+        if self._arrays is None:
+            self._open_shard()
+        elif self._length + length > self.shard_size:
+            raise RuntimeError('Shard is full, call flush() first')
+
+        for field, values in zip(FIELDS, records):
+            self._arrays[field][self._length:self._length + length] = values
+        self._length += length
+        self._games += 1
+
+    def is_full(self, next_length):
+        return self._arrays is not None and (
+            self._length + next_length > self.shard_size)
+
+    def flush(self, next_game):
+        """Close the current shard and record it in the manifest.
+
+        `next_game` is the number of the next game to deal, a resumed run
+        starts from it.
+        """
+        if self._arrays is None:
+            return
+
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays = None
+
+        self.manifest['shards'].append({
+            'name': SHARD_PATTERN.format(len(self.manifest['shards'])),
+            'records': self._length,
+        })
+        self.manifest['records'] += self._length
+        self.manifest['games'] += self._games
+        self.manifest['next_game'] = next_game
+        self._games = 0
+        self._length = 0
+        write_manifest(self.directory, self.manifest)
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def read_shards(directory):
+    """Yield the records of every closed shard as read-only memory maps."""
+    manifest = read_manifest(directory) or {'shards': []}
+    for shard in manifest['shards']:
+        path = os.path.join(directory, shard['name'])
+        yield tuple(
+            np.load(os.path.join(path, field + '.npy'),
+                    mmap_mode='r')[:shard['records']]
+            for field in FIELDS)
+
+
+def generate(directory, games, max_pips=DOUBLE_SIX, policy=None,
+             parallel=64, shard_size=100000, seed=0, temperature=1.0):
+    writer = ShardWriter(directory, max_pips, shard_size)
+    self_play = SelfPlay(policy, max_pips, parallel, seed,
+                         first_game=writer.manifest['next_game'],
+                         temperature=temperature)
+
+    start = time.perf_counter()
+    positions = 0
+    for records in self_play.games():
+        if writer.games >= games:
+            break
+        if writer.is_full(len(records[0])):
+            # Games still being played, and this one, are not in a closed
+            # shard and are not dealt again on a resume: their numbers are
+            # skipped, so no game is recorded twice
+            writer.flush(self_play.next_game)
+            elapsed = time.perf_counter() - start
+            print(f'{writer.games} games, {writer.manifest["records"]} '
+                  f'records, {positions / elapsed:.0f} positions/s')
+        writer.write_game(records)
+        positions += len(records[0])
+    writer.flush(self_play.next_game)
+    return writer.manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--games', type=int, default=10000,
+                        help='total number of games in the directory')
+    parser.add_argument('--max-pips', type=int, default=DOUBLE_SIX,
+                        choices=TILE_SETS)
+    parser.add_argument('--policy', help='.npz weights saved by Policy.save, '
+                                         'random moves without it')
+    parser.add_argument('--parallel', type=int, default=64,
+                        help='games played at once, the inference batch size')
+    parser.add_argument('--shard-size', type=int, default=100000,
+                        help='records per shard')
+    parser.add_argument('--temperature', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    init_headless_display()
+
+    policy = Policy.load(args.policy) if args.policy else None
+    if policy and policy.max_pips != args.max_pips:
+        parser.error(f'{args.policy} is a double-{policy.max_pips} policy')
+
+    manifest = generate(args.directory, args.games, args.max_pips, policy,
+                        args.parallel, args.shard_size, args.seed,
+                        args.temperature)
+    print(f'{manifest["games"]} games, {manifest["records"]} records in '
+          f'{len(manifest["shards"])} shards')
+    pg.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Results of played hands and matches kept in a local SQLite database.
+
+Writes go through a queue to a background thread, which inserts them in
+batches, so recording a hand never waits for the disk. The database is in
+WAL mode, so it can be read (e.g. `player_stats`) while games are written.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+STATS_FILE = 'stats.db'
+BATCH_SIZE = 1000
+# Longest time a recorded hand waits in the queue before it is written
+FLUSH_INTERVAL = 0.5
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS hands (
+    match_id TEXT NOT NULL,
+    hand_number INTEGER NOT NULL,
+    seat INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    max_pips INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    pips_left INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    match_id TEXT PRIMARY KEY,
+    target_score INTEGER NOT NULL,
+    hands INTEGER NOT NULL,
+    winner INTEGER,
+    scores TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+-- A player is its type at a seat, both seats of an AI-vs-AI game are
+-- NeuralNetwork
+CREATE VIEW IF NOT EXISTS player_stats AS
+SELECT player,
+       seat,
+       COUNT(*) AS hands,
+       SUM(won) AS hands_won,
+       SUM(points) AS points,
+       AVG(pips_left) AS average_pips_left
+FROM hands GROUP BY player, seat;
+'''
+
+_HAND = 'hand'
+_MATCH = 'match'
+
+
+def connect(path=STATS_FILE):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    # Safe with WAL, a crash can only lose the last transactions
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def player_stats(path=STATS_FILE):
+    with sqlite3.connect(path) as connection:
+        return connection.execute(
+            'SELECT * FROM player_stats ORDER BY points DESC').fetchall()
+
+
+class StatsStore:
+    def __init__(self, path=STATS_FILE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        # The schema is created here, so errors show up in the caller
+        connect(path).close()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def record_hand(self, match_id, hand_number, max_pips, seats, moves=0):
+        """Queue a hand, `seats` has (player, won, pips_left, points) for
+        every seat."""
+        finished_at = time.time()
+        self._queue.put((_HAND, [
+            (match_id, hand_number, seat, player, max_pips, int(won),
+             pips_left, points, moves, finished_at)
+            for seat, (player, won, pips_left, points) in enumerate(seats)
+        ]))
+
+    def record_match(self, match):
+        self._queue.put((_MATCH, [(
+            match.match_id, match.target_score, match.hand_number,
+            match.winner(), ' '.join(map(str, match.scores)), time.time(),
+        )]))
+
+    def close(self):
+        """Write everything queued and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write_loop(self):
+        connection = connect(self.path)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+            try:
+                self._write(connection, batch)
+            except sqlite3.Error:
+                # The batch is lost, the thread keeps writing the next ones
+                LOG.exception('Writing %d rows to %s failed',
+                              sum(len(rows) for _, rows in batch), self.path)
+        connection.close()
+
+    @staticmethod
+    def _write(connection, batch):
+        hands = [row for kind, rows in batch if kind == _HAND for row in rows]
+        matches = [row for kind, rows in batch if kind == _MATCH
+                   for row in rows]
+        with connection:
+            if hands:
+                connection.executemany(
+                    'INSERT INTO hands VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    hands)
+            if matches:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?)',
+                    matches)
@@ -0,0 +1,198 @@
+"""Grid of AI games played at the same time, for watching tournaments.
+
+Games are `HeadlessGame`s, so a table does not own a 4000x4000 board surface
+or 700x300 hand surfaces until it is opened.
+Each table is drawn into a small thumbnail which is redrawn only when its
+game changes. A click on a table opens it at full size, Escape goes back.
+"""
+
+import math
+import random
+
+import pygame as pg
+
+from engine import HeadlessGame, HEADLESS_HAND
+from player import HeuristicPlayer, NeuralNetwork
+from printables import Board, Hand, draw_board_thumbnail
+from utils import (
+    get_ticks, DOUBLE_SIX, MB_LEFT, MB_RIGHT, SCREEN_WIDTH, SCREEN_HEIGHT,
+)
+
+# Zoom of a table opened from the grid
+OPENED_ZOOM = 0.6
+# How long a finished game stays on its table before a new one starts
+RESULT_PAUSE_MS = 2000
+# Frames per second of the grid, a speed is the number of turns per frame
+FPS = 10
+
+
+class TableGrid:
+    def __init__(self, tables=16, max_pips=DOUBLE_SIX, policy=None, speed=1,
+                 heuristic=None):
+        pg.font.init()
+        self.font = pg.font.Font(None, 20)
+
+        self.screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self._running = True
+        self.max_pips = max_pips
+        self.policy = policy
+        self.heuristic = heuristic
+        # Turns per table per frame, None plays a game through in one frame
+        self.speed = speed
+
+        self.columns = math.ceil(math.sqrt(tables))
+        rows = math.ceil(tables / self.columns)
+        self.cell_width = SCREEN_WIDTH // self.columns
+        self.cell_height = SCREEN_HEIGHT // rows
+
+        self.games = [self._new_game() for _ in range(tables)]
+        self._thumbnails = [pg.Surface((self.cell_width - 2,
+                                        self.cell_height - 2))
+                            for _ in range(tables)]
+        # What a thumbnail shows, it is redrawn only when this changes
+        self._drawn_versions = [None] * tables
+        self._finished_at = [None] * tables
+        self.opened = None
+        self._mouse_position = (0, 0)
+
+    def _new_game(self):
+        if self.heuristic:
+            players = [HeuristicPlayer(self.heuristic, **HEADLESS_HAND)
+                       for _ in range(2)]
+        else:
+            players = [NeuralNetwork(self.policy, **HEADLESS_HAND)
+                       for _ in range(2)]
+        return HeadlessGame(players, self.max_pips, rng=random.Random())
+
+    def run(self):
+        clock = pg.time.Clock()
+        while self._running:
+            self._handle_frame()
+            clock.tick(FPS)
+        pg.quit()
+
+    def _handle_frame(self):
+        for event in pg.event.get():
+            self._handle_event(event)
+
+        for i in range(len(self.games)):
+            self._advance(i)
+
+        if self.opened is None:
+            self._draw_grid()
+        else:
+            self._draw_opened()
+        pg.display.flip()
+
+    def _handle_event(self, event):
+        if event.type == pg.QUIT:
+            self._running = False
+        elif event.type == pg.KEYDOWN:
+            if event.key == pg.K_ESCAPE and self.opened is not None:
+                self._close()
+        elif event.type == pg.MOUSEBUTTONDOWN:
+            if event.button == MB_LEFT and self.opened is None:
+                self._open(self._table_at(event.pos))
+            self._mouse_position = event.pos
+        elif event.type == pg.MOUSEMOTION:
+            self._handle_board_movement(event)
+        elif event.type == pg.MOUSEWHEEL and self.opened is not None:
+            # Wheel events have no position, motion events keep it
+            self.games[self.opened].board.zoom_by(event.y,
+                                                  self._mouse_position)
+
+    def _handle_board_movement(self, motion):
+        # Like main.Game, only the event is looked at, not the mouse state
+        if self.opened is not None and motion.buttons[MB_RIGHT - 1]:
+            self.games[self.opened].board.rect.move_ip(*motion.rel)
+        self._mouse_position = motion.pos
+
+    def _advance(self, i):
+        game = self.games[i]
+        if not game.finished():
+            steps = 0
+            while not game.finished() and (not self.speed or
+                                           steps < self.speed):
+                game.step()
+                steps += 1
+            return
+
+        now = get_ticks()
+        if self._finished_at[i] is None:
+            self._finished_at[i] = now
+        elif now - self._finished_at[i] >= RESULT_PAUSE_MS and i != self.opened:
+            self.games[i] = self._new_game()
+            self._finished_at[i] = None
+
+    def _table_at(self, position):
+        column = position[0] // self.cell_width
+        row = position[1] // self.cell_height
+        i = row * self.columns + column
+        return i if column < self.columns and i < len(self.games) else None
+
+    def _open(self, i):
+        if i is None:
+            return
+        board = self.games[i].board
+        tiles = [tile.rect for tile in board.tiles]
+        bounds = tiles[0].unionall(tiles)
+        board.zoom = OPENED_ZOOM
+        board.set_dimension(round(Board.WIDTH * OPENED_ZOOM),
+                            round(Board.HEIGHT * OPENED_ZOOM))
+        board.set_position(SCREEN_WIDTH / 2 - bounds.centerx * OPENED_ZOOM,
+                           SCREEN_HEIGHT / 2 - bounds.centery * OPENED_ZOOM)
+        for player in self.games[i].players:
+            player.hand.set_dimension(Hand.WIDTH, Hand.HEIGHT)
+        self.opened = i
+
+    def _close(self):
+        # Give the board and hand surfaces back, thumbnails do not need them
+        game = self.games[self.opened]
+        game.board.zoom = 1.0
+        game.board.set_dimension(1, 1)
+        for player in game.players:
+            player.hand.set_dimension(HEADLESS_HAND['width'],
+                                      HEADLESS_HAND['height'])
+        self.opened = None
+
+    def _caption(self, i):
+        game = self.games[i]
+        text = f'#{i + 1}: {game.moves} moves'
+        if game.finished():
+            winner = game.winner()
+            text += ', fish' if winner is None else f', player {winner + 1} won'
+        return text
+
+    def _draw_grid(self):
+        self.screen.fill(pg.Color('black'))
+        for i, game in enumerate(self.games):
+            version = (id(game), game.moves, game.finished())
+            thumbnail = self._thumbnails[i]
+            if self._drawn_versions[i] != version:
+                draw_board_thumbnail(game.board, thumbnail)
+                caption = self.font.render(self._caption(i), False,
+                                           (0, 255, 0), (0, 0, 128))
+                thumbnail.blit(caption, (2, 2))
+                self._drawn_versions[i] = version
+
+            column, row = i % self.columns, i // self.columns
+            self.screen.blit(thumbnail, (column * self.cell_width + 1,
+                                         row * self.cell_height + 1))
+
+    def _draw_opened(self):
+        game = self.games[self.opened]
+        self.screen.fill(pg.Color('black'))
+        game.board.rec_blit()
+        self.screen.blit(game.board.surf, game.board.rect)
+
+        bottom_hand, top_hand = game.players[0].hand, game.players[1].hand
+        for hand, y in ((top_hand, 0),
+                        (bottom_hand, SCREEN_HEIGHT - bottom_hand.rect.height)):
+            hand.rec_blit()
+            self.screen.blit(hand.surf, (0, y))
+
+        caption = self.font.render(self._caption(self.opened) +
+                                   ' (Esc to go back)', False,
+                                   (0, 255, 0), (0, 0, 128))
+        self.screen.blit(caption, (SCREEN_WIDTH - caption.get_width() - 10,
+                                   10))
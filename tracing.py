@@ -0,0 +1,73 @@
+"""Structured trace of game events kept in a fixed-size ring buffer.
+
+Call sites check `tracing.enabled` before recording, so a disabled trace
+costs one attribute lookup. An event is stored as a tuple of its time, kind
+and values; nothing is formatted until `dump` writes the buffer as JSONL.
+
+    if tracing.enabled:
+        tracing.record(tracing.BAZAR_DRAW, player, first, second, left)
+"""
+
+import collections
+import json
+import time
+
+TURN = 'turn'
+BAZAR_DRAW = 'bazar_draw'
+MOVE_GENERATION = 'move_generation'
+RENDER = 'render'
+CACHE_MISS = 'cache_miss'
+
+EVENT_FIELDS = {
+    TURN: ('player', 'first', 'second', 'x', 'y'),
+    BAZAR_DRAW: ('player', 'first', 'second', 'left'),
+    MOVE_GENERATION: ('hand', 'open_ends', 'candidates'),
+    RENDER: ('sprites', 'duration_ns'),
+    CACHE_MISS: ('cache', 'key'),
+}
+
+DEFAULT_SIZE = 5000
+
+enabled = False
+_events = collections.deque(maxlen=0)
+
+
+def enable(size=DEFAULT_SIZE):
+    global enabled, _events
+    _events = collections.deque(_events, maxlen=size)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def clear():
+    _events.clear()
+
+
+def record(kind, *values):
+    _events.append((time.perf_counter_ns(), kind, values))
+
+
+def events():
+    """The buffered events as dicts, the oldest first."""
+    result = []
+    for timestamp, kind, values in list(_events):
+        event = {'t_ns': timestamp, 'event': kind}
+        for field, value in zip(EVENT_FIELDS[kind], values):
+            if not isinstance(value, (int, float, str, type(None))):
+                value = str(value)
+            event[field] = value
+        result.append(event)
+    return result
+
+
+def dump(path):
+    """Write the buffered events to `path` as JSONL, return their number."""
+    buffered = events()
+    with open(path, 'w') as f:
+        for event in buffered:
+            f.write(json.dumps(event) + '\n')
+    return len(buffered)
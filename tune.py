@@ -0,0 +1,157 @@
+#! /usr/bin/python3
+"""Tune the weights of the `HeuristicPlayer` with an evolution strategy.
+
+Every generation the current weights are perturbed with gaussian noise in
+both directions, each candidate plays the same seeded games against the
+current weights (both seats) and the weights move towards the noise of the
+candidates which won more. Candidates are evaluated in parallel by a process
+pool, the progress is written to a checkpoint after every generation and a
+run started with the same checkpoint continues from there.
+
+    python3 tune.py heuristic.json --generations 50 --games 100
+
+The checkpoint is read by `Heuristic.load`, so main.py --heuristic plays
+with the tuned weights.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import random
+import time
+
+from engine import HeadlessGame, HEADLESS_HAND
+from heuristic import Heuristic, DEFAULT_WEIGHTS, FEATURES
+from player import HeuristicPlayer
+from utils import (
+    init_headless_display, make_tile_set, DOUBLE_SIX, TILE_SETS,
+)
+
+POPULATION = 16
+SIGMA = 0.5
+LEARNING_RATE = 1.0
+
+
+def evaluate(task):
+    """Play every seed with both seats, return the score of the candidate:
+    1 per win, 0.5 per draw."""
+    weights, opponent_weights, seeds, max_pips = task
+    candidate = Heuristic(weights, max_pips)
+    opponent = Heuristic(opponent_weights, max_pips)
+    score = 0.0
+    for seed in seeds:
+        bazar = make_tile_set(max_pips)
+        random.Random(seed).shuffle(bazar)
+        for seat in (0, 1):
+            players = [HeuristicPlayer(opponent, **HEADLESS_HAND),
+                       HeuristicPlayer(opponent, **HEADLESS_HAND)]
+            players[seat] = HeuristicPlayer(candidate, **HEADLESS_HAND)
+            winner = HeadlessGame(players, max_pips, random.Random(seed),
+                                  bazar=bazar).play()
+            if winner is None:
+                score += 0.5
+            elif winner == seat:
+                score += 1
+    return score
+
+
+def centered_ranks(scores):
+    order = sorted(range(len(scores)), key=scores.__getitem__)
+    ranks = [0.0] * len(scores)
+    for rank, i in enumerate(order):
+        ranks[i] = rank / (len(scores) - 1) - 0.5
+    return ranks
+
+
+def load_checkpoint(path, max_pips, sigma):
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint['max_pips'] != max_pips:
+            raise ValueError(f'{path} is a double-{checkpoint["max_pips"]} '
+                             f'checkpoint')
+        return checkpoint
+    return {'weights': list(DEFAULT_WEIGHTS), 'max_pips': max_pips,
+            'sigma': sigma, 'generation': 0, 'history': []}
+
+
+def save_checkpoint(path, checkpoint):
+    # A run killed while writing keeps the previous checkpoint
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(temporary, path)
+
+
+def tune(path, generations, games, population=POPULATION, sigma=SIGMA,
+         learning_rate=LEARNING_RATE, max_pips=DOUBLE_SIX, seed=0,
+         workers=None):
+    checkpoint = load_checkpoint(path, max_pips, sigma)
+    sigma = checkpoint['sigma']
+    pairs = population // 2
+
+    with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=init_headless_display) as pool:
+        for _ in range(generations):
+            generation = checkpoint['generation']
+            mean = checkpoint['weights']
+            # Seeded by the generation, so a resumed run plays the same games
+            rng = random.Random(seed * 1000003 + generation)
+            noise = [[rng.gauss(0, 1) for _ in mean] for _ in range(pairs)]
+            candidates = [[w + sign * sigma * e for w, e in zip(mean, eps)]
+                          for eps in noise for sign in (1, -1)]
+            seeds = [rng.getrandbits(32) for _ in range(games)]
+
+            start = time.perf_counter()
+            scores = list(pool.map(evaluate, [
+                (weights, mean, seeds, max_pips) for weights in candidates]))
+            elapsed = time.perf_counter() - start
+
+            ranks = centered_ranks(scores)
+            checkpoint['weights'] = [
+                w + learning_rate * sigma / pairs * sum(
+                    (ranks[2 * i] - ranks[2 * i + 1]) * eps[j]
+                    for i, eps in enumerate(noise))
+                for j, w in enumerate(mean)]
+            checkpoint['generation'] = generation + 1
+
+            played = len(candidates) * games * 2
+            best = max(scores) / (games * 2)
+            checkpoint['history'].append({
+                'generation': generation, 'best_win_rate': best,
+                'games_per_second': played / elapsed})
+            save_checkpoint(path, checkpoint)
+
+            print(f'generation {generation}: best {best:.0%} against the '
+                  f'mean, {played} games in {elapsed:.1f}s '
+                  f'({played / elapsed:.0f} games/s)')
+            print('   ', ' '.join(f'{name}={weight:.2f}' for name, weight in
+                                  zip(FEATURES, checkpoint['weights'])))
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('checkpoint')
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--games', type=int, default=50,
+                        help='seeded deals played by every candidate, twice')
+    parser.add_argument('--population', type=int, default=POPULATION)
+    parser.add_argument('--sigma', type=float, default=SIGMA)
+    parser.add_argument('--learning-rate', type=float, default=LEARNING_RATE)
+    parser.add_argument('--max-pips', type=int, default=DOUBLE_SIX,
+                        choices=TILE_SETS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.population < 2:
+        parser.error('--population must be at least 2')
+
+    tune(args.checkpoint, args.generations, args.games, args.population,
+         args.sigma, args.learning_rate, args.max_pips, args.seed,
+         args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,24 @@
+import os
+import time
 from enum import Enum
 from collections import namedtuple
 
+import pygame as pg
+
 Point = namedtuple('Point', ['x', 'y'])
+# Open end of the board: a tile on it and a rect next to it
+Placement = namedtuple('Placement', ['tile', 'rect'])
+
+SCREEN_WIDTH = 1000
+SCREEN_HEIGHT = 1000
+
+MB_LEFT = 1
+MB_RIGHT = 3
+
+DOUBLE_SIX = 6
+DOUBLE_NINE = 9
+DOUBLE_TWELVE = 12
+TILE_SETS = (DOUBLE_SIX, DOUBLE_NINE, DOUBLE_TWELVE)
 
 
 class Orientation(Enum):
@@ -32,3 +49,25 @@ def in_it(rect, position, shift=None):
 
 def get_sprite_path(sprite_name):
     return f'sprites/{sprite_name}.png'
+
+
+def get_ticks():
+    """Milliseconds like `pg.time.get_ticks`, which needs `pg.init()`."""
+    return int(time.monotonic() * 1000)
+
+
+def init_headless_display():
+    """Start the display of a script without a screen, or of a worker of its
+    process pool: sprites are converted to the display format, so even
+    games nobody watches need one."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pg.display.init()
+    pg.display.set_mode((1, 1))
+
+
+def make_tile_set(max_pips=DOUBLE_SIX):
+    return [
+        (first, second)
+        for first in range(0, max_pips + 1)
+        for second in range(first, max_pips + 1)
+    ]